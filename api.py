@@ -179,14 +179,14 @@ def get_pending_orders():
     """
     return {
         "pending_orders": state.bot_state.pending_orders,
-        "exchange_open_orders": state.bot_state.exchange_open_orders
+        "exchange_open_orders": state.bot_state.exchange_open_orders_list
     }
 
 @app.get("/api/exchange-orders")
 def get_exchange_orders():
     """Get actual open orders from the exchange."""
     return {
-        "orders": state.bot_state.exchange_open_orders
+        "orders": state.bot_state.exchange_open_orders_list
     }
 
 @app.get("/api/portfolio-history")
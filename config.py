@@ -29,6 +29,7 @@ def _safe_int_env(name, default):
 BINANCE_WEIGHT_LIMIT_PER_MIN = _safe_int_env("BINANCE_WEIGHT_LIMIT_PER_MIN", 2400)
 BINANCE_BAN_SLEEP_SECONDS = _safe_int_env("BINANCE_BAN_SLEEP_SECONDS", 300)
 OHLCV_CACHE_MAX_AGE_SECONDS = _safe_int_env("OHLCV_CACHE_MAX_AGE_SECONDS", 300)
+OPEN_ORDERS_CACHE_MAX_AGE_SECONDS = _safe_int_env("OPEN_ORDERS_CACHE_MAX_AGE_SECONDS", 2)
 CANDLE_CLOSE_BUFFER_SECONDS = _safe_int_env("CANDLE_CLOSE_BUFFER_SECONDS", 60)
 
 TP_SL_BUFFER_TICKS = _safe_int_env("TP_SL_BUFFER_TICKS", 1)
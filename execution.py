@@ -10,6 +10,14 @@ from order_utils import normalize_symbol
 RATE_LIMIT_PER_MINUTE = getattr(config, "BINANCE_WEIGHT_LIMIT_PER_MIN", 2400)
 BAN_SLEEP_SECONDS = getattr(config, "BINANCE_BAN_SLEEP_SECONDS", 300)
 
+# Conditional order type -> key in the get_tp_sl_orders_for_position result
+_TP_SL_ORDER_KIND = {
+    'STOP_MARKET': 'sl_order',
+    'stop_market': 'sl_order',
+    'TAKE_PROFIT_MARKET': 'tp_order',
+    'take_profit_market': 'tp_order',
+}
+
 
 def rate_limit_guard(func):
     @wraps(func)
@@ -48,6 +56,15 @@ class BinanceClient:
                 pass
         self.allowed_symbols = {normalize_symbol(sym) for sym in config.TRADING_PAIRS}
         self._cached_positions = {}
+        # Last get_all_open_orders() result indexed by normalized symbol, and its
+        # time.monotonic() timestamp
+        self._open_orders_snapshot = None
+        self._open_orders_snapshot_ts = 0.0
+        # symbol -> resolved market symbol, valid for the markets dict it was built from
+        self._resolved_symbol_cache = None
+        self._resolved_symbol_markets = None
+        # (base, quote) -> first matching market, built from the same markets dict
+        self._market_index = None
 
     def _handle_rate_limit_error(self, error) -> bool:
         code = getattr(error, 'code', None) or getattr(error, 'status', None) or getattr(error, 'httpStatusCode', None)
@@ -98,15 +115,32 @@ class BinanceClient:
         """Resolve a configured symbol to the exact market symbol loaded by ccxt."""
         try:
             markets = self.exchange.markets or self.exchange.load_markets()
+            # Created lazily so clients built without __init__ still work
+            cache = getattr(self, '_resolved_symbol_cache', None)
+            if cache is None or self._resolved_symbol_markets is not markets:
+                # First use or markets reloaded: start a fresh cache
+                cache = self._resolved_symbol_cache = {}
+                self._resolved_symbol_markets = markets
+                self._market_index = None
+            resolved = cache.get(symbol)
+            if resolved is not None:
+                return resolved
             if symbol in markets:
+                cache[symbol] = symbol
                 return symbol
             if '/' in symbol:
                 base, quote = symbol.split('/', 1)
-                matches = [m for m in markets.values() if m.get('base') == base and m.get('quote') == quote]
-                if matches:
-                    resolved = matches[0].get('symbol', symbol)
+                index = self._market_index
+                if index is None:
+                    index = self._market_index = {}
+                    for m in markets.values():
+                        index.setdefault((m.get('base'), m.get('quote')), m)
+                match = index.get((base, quote))
+                if match is not None:
+                    resolved = match.get('symbol', symbol)
                     if resolved != symbol:
                         print(f"Resolved symbol {symbol} -> {resolved}")
+                    cache[symbol] = resolved
                     return resolved
             # Log a sample of markets to help diagnose missing symbols (e.g., MATIC/SHIB)
             sample_keys = list(markets.keys())[:5]
@@ -201,10 +235,48 @@ class BinanceClient:
         try:
             orders = self.exchange.fetch_open_orders()
             allowed = self.allowed_symbols or {normalize_symbol(sym) for sym in config.TRADING_PAIRS}
-            return [o for o in orders if normalize_symbol(o.get('symbol')) in allowed]
+            open_orders = []
+            by_symbol = {}
+            for o in orders:
+                norm = normalize_symbol(o.get('symbol'))
+                if norm in allowed:
+                    open_orders.append(o)
+                    by_symbol.setdefault(norm, []).append(o)
+            self._open_orders_snapshot = by_symbol
+            self._open_orders_snapshot_ts = time.monotonic()
+            return open_orders
         except Exception as e:
             print(f"Error fetching all open orders: {e}")
             return []
+
+    def get_open_orders_by_symbol(self):
+        """Fetch all open orders once and return them grouped by normalized symbol.
+        
+        Returns:
+            dict: normalized symbol -> list of orders, or None if the fetch failed
+        """
+        self._invalidate_open_orders_snapshot()
+        self.get_all_open_orders()
+        return self._open_orders_snapshot
+
+    def _invalidate_open_orders_snapshot(self):
+        """Drop the cached open-orders snapshot after placing or cancelling orders."""
+        self._open_orders_snapshot = None
+
+    def _fresh_open_orders_snapshot(self, symbol):
+        """Return symbol's cached open orders if the snapshot is recent enough, else None."""
+        # Read lazily so clients built without __init__ still work
+        snapshot = getattr(self, '_open_orders_snapshot', None)
+        if snapshot is None:
+            return None
+        allowed = getattr(self, 'allowed_symbols', None) or {normalize_symbol(sym) for sym in config.TRADING_PAIRS}
+        norm = normalize_symbol(symbol)
+        if norm not in allowed:
+            return None
+        age = time.monotonic() - getattr(self, '_open_orders_snapshot_ts', 0.0)
+        if age > config.OPEN_ORDERS_CACHE_MAX_AGE_SECONDS:
+            return None
+        return snapshot.get(norm, [])
 
     @rate_limit_guard
     def get_recent_trades(self, symbol=None, limit=50):
@@ -233,6 +305,7 @@ class BinanceClient:
 
     @rate_limit_guard
     def cancel_all_orders(self, symbol):
+        self._invalidate_open_orders_snapshot()
         try:
             resolved_symbol = self._resolve_symbol(symbol)
             self.exchange.cancel_all_orders(resolved_symbol)
@@ -242,6 +315,7 @@ class BinanceClient:
 
     @rate_limit_guard
     def place_limit_order(self, symbol, side, amount, price):
+        self._invalidate_open_orders_snapshot()
         try:
             resolved_symbol = self._resolve_symbol(symbol)
             payload = {'symbol': resolved_symbol, 'type': 'limit', 'side': side, 'amount': amount, 'price': price}
@@ -256,6 +330,7 @@ class BinanceClient:
 
     @rate_limit_guard
     def place_stop_loss(self, symbol, side, amount, stop_price):
+        self._invalidate_open_orders_snapshot()
         try:
             resolved_symbol = self._resolve_symbol(symbol)
             # STOP_MARKET for Futures
@@ -272,6 +347,7 @@ class BinanceClient:
 
     @rate_limit_guard
     def place_take_profit(self, symbol, side, amount, tp_price):
+        self._invalidate_open_orders_snapshot()
         try:
             resolved_symbol = self._resolve_symbol(symbol)
             # TAKE_PROFIT_MARKET for Futures
@@ -327,39 +403,49 @@ class BinanceClient:
             print(f"Error fetching open orders for {symbol if symbol else 'all symbols'}: {e}")
             return []
     
-    def get_tp_sl_orders_for_position(self, symbol):
+    def get_tp_sl_orders_for_position(self, symbol, orders=None, allow_cached=False):
         """Get TP/SL orders for a specific symbol.
         
+        Without orders, fetches the symbol's open orders. With allow_cached, the
+        last get_all_open_orders() snapshot is reused instead when it is younger
+        than OPEN_ORDERS_CACHE_MAX_AGE_SECONDS. Leave it off wherever the result
+        decides whether protective orders get placed: a stop that filled or was
+        cancelled inside that window would still look live.
+        
         Args:
             symbol: Trading symbol to check for TP/SL orders
+            orders: Optional pre-fetched open orders for this symbol
+            allow_cached: Accept a recent open-orders snapshot instead of fetching
             
         Returns:
             dict: {'sl_order': order or None, 'tp_order': order or None}
         """
-        try:
-            resolved_symbol = self._resolve_symbol(symbol)
-            orders = self.get_open_orders(resolved_symbol)
-            sl_order = None
-            tp_order = None
-            
-            for order in orders:
-                order_symbol = order.get('symbol')
-                if order_symbol not in (symbol, resolved_symbol):
-                    continue
-                order_type = order.get('type', '')
-                is_reduce_only = order.get('reduceOnly', False)
-                
-                if is_reduce_only or order_type in ['STOP_MARKET', 'TAKE_PROFIT_MARKET', 
-                                                     'stop_market', 'take_profit_market']:
-                    if order_type in ['STOP_MARKET', 'stop_market']:
-                        sl_order = order
-                    elif order_type in ['TAKE_PROFIT_MARKET', 'take_profit_market']:
-                        tp_order = order
-            
-            return {'sl_order': sl_order, 'tp_order': tp_order}
-        except Exception as e:
-            print(f"Error getting TP/SL orders for {symbol}: {e}")
-            return {'sl_order': None, 'tp_order': None}
+        result = {'sl_order': None, 'tp_order': None}
+        resolved_symbol = self._resolve_symbol(symbol)
+        if orders is None and allow_cached:
+            orders = self._fresh_open_orders_snapshot(symbol)
+        if orders is None:
+            try:
+                orders = self.get_open_orders(resolved_symbol)
+            except Exception as e:
+                print(f"Error getting TP/SL orders for {symbol}: {e}")
+                return result
+            if orders is None:
+                return result
+        
+        for order in orders:
+            if not isinstance(order, dict):
+                print(f"WARNING: Skipping malformed open order for {symbol}: {order!r}")
+                continue
+            order_symbol = order.get('symbol')
+            if order_symbol not in (symbol, resolved_symbol):
+                continue
+            # Only the order type decides SL vs TP; plain reduce-only orders match neither
+            kind = _TP_SL_ORDER_KIND.get(order.get('type'))
+            if kind is not None:
+                result[kind] = order
+        
+        return result
     
     @rate_limit_guard
     def cancel_order(self, symbol, order_id):
@@ -372,6 +458,7 @@ class BinanceClient:
         Returns:
             bool: True if successful, False otherwise
         """
+        self._invalidate_open_orders_snapshot()
         try:
             resolved_symbol = self._resolve_symbol(symbol)
             self.exchange.cancel_order(order_id, resolved_symbol)
@@ -404,6 +491,7 @@ class BinanceClient:
             indicators = (text, body)
             return any('reduceonly' in s or 'reduce only' in s or 'reduce_only' in s for s in indicators if s)
 
+        self._invalidate_open_orders_snapshot()
         try:
             # Fetch latest position if not provided for safety checks
             try:
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 def detect_order_blocks(df, length=5):
     """
@@ -25,63 +26,66 @@ def detect_order_blocks(df, length=5):
     # Pivot Low: Low[i] < Low[i +/- 1...length]
     # We must account for look-ahead bias by only confirming at i+length
     
-    # We'll iterate through the DF up to len - length
-    # Valid index range for pivot check: [length, len(df) - length]
+    # Valid index range for pivot check: [length, len(df) - length)
+    # i is the potential pivot candle, i+length the confirm candle.
+    # Work on plain float arrays: every window min/max is computed at once
+    # instead of slicing the DataFrame per candle.
+    highs = df['high'].to_numpy(dtype=np.float64)
+    lows = df['low'].to_numpy(dtype=np.float64)
+    upper_band = df['upper_band'].to_numpy()
+    lower_band = df['lower_band'].to_numpy()
+    window = 2 * length + 1
     
-    for i in range(length, len(df) - length):
-        # We are at time 'i'. But we can only confirm this pivot at time 'i + length'.
-        # For live trading, we only care if we have CONFIRMED it by "now" (last candle).
-        # So 'i' is the potential pivot candle. 'i+length' is the confirm candle.
+    if len(df) >= window:
+        centre = slice(length, len(df) - length)
+        # fmin/fmax skip NaN like pandas' Series.min()/max()
+        window_low_min = np.fmin.reduce(sliding_window_view(lows, window), axis=1)
+        window_high_max = np.fmax.reduce(sliding_window_view(highs, window), axis=1)
         
-        # Check Pivot Low (Bullish OB Setup?)
-        # User Logic: Volume Pivot High + Market Structure condition (Low[length] < Lower Band)
-        # Assuming "Volume Pivot Low" for Bullish.
-        # Check if Low[i] is minimum in window [i-length, i+length]
-        window_lows = df['low'].iloc[i-length : i+length+1]
-        is_pivot_low = df['low'].iloc[i] == window_lows.min()
+        # Pivot Low (Bullish OB Setup): Low[i] is the window minimum and
+        # breaks below the Lower Band ("Low[length] < Lower Band")
+        is_bullish = (lows[centre] == window_low_min) & (lows[centre] < lower_band[centre])
+        # Pivot High (Bearish OB Setup): High[i] is the window maximum and
+        # breaks above the Upper Band
+        is_bearish = (highs[centre] == window_high_max) & (highs[centre] > upper_band[centre])
         
-        if is_pivot_low:
-            # Check market structure condition
-            # "Low[length] < Lower Band".
-            # Here 'Low[i]' is the current low. 'Lower Band' at i.
-            if df['low'].iloc[i] < df['lower_band'].iloc[i]:
+        for i in np.flatnonzero(is_bullish | is_bearish) + length:
+            i = int(i)
+            high = highs[i]
+            low = lows[i]
+            if is_bullish[i - length]:
                 # Found Potential Bullish OB
-                ob = {
+                obs.append({
                     'type': 'bullish',
-                    'top': df['high'].iloc[i], # Entry at top of candle
-                    'bottom': df['low'].iloc[i] - (df['high'].iloc[i] - df['low'].iloc[i])*0.1, # SL slightly below
+                    'top': high, # Entry at top of candle
+                    'bottom': low - (high - low)*0.1, # SL slightly below
                     # User said: "Entry Price: Top edge... Stop Loss: Minimally below bottom edge"
                     # Let's refine SL later in risk manager, just store raw OB limits here.
-                    'ob_top': df['high'].iloc[i],
-                    'ob_bottom': df['low'].iloc[i],
+                    'ob_top': high,
+                    'ob_bottom': low,
                     'time': df.index[i],
                     'confirm_index': i + length
-                }
-                obs.append(ob)
-                
-        # Check Pivot High (Bearish OB Setup)
-        window_highs = df['high'].iloc[i-length : i+length+1]
-        is_pivot_high = df['high'].iloc[i] == window_highs.max()
-        
-        if is_pivot_high:
-            if df['high'].iloc[i] > df['upper_band'].iloc[i]:
+                })
+            if is_bearish[i - length]:
                 # Found Potential Bearish OB
-                ob = {
+                obs.append({
                     'type': 'bearish',
-                    'top': df['high'].iloc[i], # SL above top
-                    'bottom': df['low'].iloc[i], # Entry at bottom
-                    'ob_top': df['high'].iloc[i],
-                    'ob_bottom': df['low'].iloc[i],
+                    'top': high, # SL above top
+                    'bottom': low, # Entry at bottom
+                    'ob_top': high,
+                    'ob_bottom': low,
                     'time': df.index[i],
                     'confirm_index': i + length
-                }
-                obs.append(ob)
+                })
                 
     # Now Check Mitigation
-    # Iterate through confirmed OBs and check if price touched them AFTER confirmation
+    # Check price action from each OB's confirm_index + 1 to the end. The
+    # lowest low / highest high over every suffix is computed once (reverse
+    # running fmin/fmax, NaN-skipping), so each OB is a single lookup.
+    future_low_min = np.fmin.accumulate(lows[::-1])[::-1]
+    future_high_max = np.fmax.accumulate(highs[::-1])[::-1]
     valid_obs = []
     for ob in obs:
-        # Check price action from confirm_index + 1 to end
         start_check = ob['confirm_index'] + 1
         if start_check >= len(df):
             # Not confirmed yet or just confirmed
@@ -89,22 +93,19 @@ def detect_order_blocks(df, length=5):
             continue
             
         mitigated = False
-        subset = df.iloc[start_check:]
         
         if ob['type'] == 'bullish':
             # Mitigated if Price drops into the zone (Top to Bottom)
             # Or wicks into it.
             # Entry is at 'ob_top'.
             # If Low of any subsequent candle <= ob_top, it triggered/mitigated.
-            if (subset['low'] <= ob['ob_top']).any():
-                mitigated = True
+            mitigated = future_low_min[start_check] <= ob['ob_top']
                 
         elif ob['type'] == 'bearish':
             # Mitigated if Price rises into the zone (Bottom to Top)
             # Entry is at 'ob_bottom'.
             # If High of any subsequent candle >= ob_bottom, it triggered/mitigated.
-            if (subset['high'] >= ob['ob_bottom']).any():
-                mitigated = True
+            mitigated = future_high_max[start_check] >= ob['ob_bottom']
                 
         if not mitigated:
             valid_obs.append(ob)
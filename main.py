@@ -7,7 +7,7 @@ import lux_algo
 import risk_manager
 import state
 import order_utils
-from order_utils import log_pending_order_active_throttled, normalize_symbol
+from order_utils import TP_SL_ORDER_TYPES, log_pending_order_active_throttled, normalize_symbol
 from execution import BinanceClient
 import threading
 from reconciler.closure_fix import get_position_side, log_tp_sl_inconsistent
@@ -112,15 +112,18 @@ def reconcile_live_orders(client):
     
     # Track matched order IDs
     matched_order_ids = set()
+    # Metric deltas for this pass, applied and saved once at the end
+    cancelled_count = 0
+    filled_count = 0
     
     # Match exchange orders with pending orders
     for order in all_exchange_orders:
         order_id = order.get('id')
         symbol = order.get('symbol')
-        order_type = order.get('type', '')
+        order_type = order.get('type') or ''
         
-        # Check if it's a TP/SL order (reduceOnly)
-        is_tp_sl = order.get('reduceOnly', False) or order_type in ['STOP_MARKET', 'TAKE_PROFIT_MARKET']
+        # Check if it's a TP/SL order (reduceOnly); ccxt may report either case
+        is_tp_sl = order.get('reduceOnly', False) or order_type.casefold() in TP_SL_ORDER_TYPES
         
         # Check if matches a pending order
         pending = state.get_pending_order(symbol)
@@ -186,8 +189,7 @@ def reconcile_live_orders(client):
                         try:
                             client.exchange.cancel_order(order_id, symbol)
                             print(f"Cancelled orphaned order {order_id}")
-                            state.bot_state.metrics.cancelled_orders_count += 1
-                            state.save_metrics()
+                            cancelled_count += 1
                             state.add_reconciliation_log("order_cancelled", {
                                 "order_id": order_id,
                                 "symbol": symbol,
@@ -228,8 +230,7 @@ def reconcile_live_orders(client):
                             "message": f"Orphaned order found with status {status}"
                         })
                         if status == 'filled':
-                            state.bot_state.metrics.filled_orders_count += 1
-                            state.save_metrics()
+                            filled_count += 1
                 else:
                     print(f"Order {order_id} not found, removing from pending")
                     orphaned_symbols.append(symbol)
@@ -246,6 +247,11 @@ def reconcile_live_orders(client):
     for symbol in orphaned_symbols:
         state.remove_pending_order(symbol)
     
+    if cancelled_count or filled_count:
+        state.bot_state.metrics.cancelled_orders_count += cancelled_count
+        state.bot_state.metrics.filled_orders_count += filled_count
+        state.save_metrics()
+    
     print(f"=== Reconciliation Complete: {len(matched_order_ids)} orders matched, {len(orphaned_symbols)} orphaned ===\n")
     state.add_reconciliation_log("reconciliation_complete", {
         "matched_orders": len(matched_order_ids),
@@ -253,7 +259,7 @@ def reconcile_live_orders(client):
         "message": "Order reconciliation completed"
     })
 
-def reconcile_position_tp_sl(client, symbol, position, pending_order=None):
+def reconcile_position_tp_sl(client, symbol, position, pending_order=None, open_orders=None):
     """Reconcile TP/SL orders for an open position.
     
     This function:
@@ -266,6 +272,7 @@ def reconcile_position_tp_sl(client, symbol, position, pending_order=None):
         symbol: Trading symbol
         position: Position dict from exchange
         pending_order: Optional pending order data with TP/SL params
+        open_orders: Optional pre-fetched open orders for symbol (skips a fetch)
         
     Returns:
         bool: True if reconciliation successful, False otherwise
@@ -291,7 +298,7 @@ def reconcile_position_tp_sl(client, symbol, position, pending_order=None):
             return False
         
         # Get existing TP/SL orders
-        tp_sl_orders = client.get_tp_sl_orders_for_position(symbol)
+        tp_sl_orders = client.get_tp_sl_orders_for_position(symbol, orders=open_orders)
         sl_order = tp_sl_orders['sl_order']
         tp_order = tp_sl_orders['tp_order']
         
@@ -341,8 +348,8 @@ def reconcile_position_tp_sl(client, symbol, position, pending_order=None):
                 "message": f"Position exists without SL order"
             })
         else:
-            sl_amount = float(sl_order.get('amount', 0))
-            if abs(sl_amount - formatted_size) > formatted_size * config.TP_SL_QUANTITY_TOLERANCE:
+            if not order_utils.order_quantity_matches(sl_order, formatted_size, config.TP_SL_QUANTITY_TOLERANCE):
+                sl_amount = sl_order.get('amount')
                 print(f"⚠ SL quantity mismatch for {symbol} ({side}): {sl_amount} vs {formatted_size}")
                 needs_sl = True
                 client.cancel_order(symbol, sl_order['id'])
@@ -362,8 +369,8 @@ def reconcile_position_tp_sl(client, symbol, position, pending_order=None):
                 "message": f"Position exists without TP order"
             })
         else:
-            tp_amount = float(tp_order.get('amount', 0))
-            if abs(tp_amount - formatted_size) > formatted_size * config.TP_SL_QUANTITY_TOLERANCE:
+            if not order_utils.order_quantity_matches(tp_order, formatted_size, config.TP_SL_QUANTITY_TOLERANCE):
+                tp_amount = tp_order.get('amount')
                 print(f"⚠ TP quantity mismatch for {symbol} ({side}): {tp_amount} vs {formatted_size}")
                 needs_tp = True
                 client.cancel_order(symbol, tp_order['id'])
@@ -419,18 +426,20 @@ def reconcile_existing_positions_with_trades(client):
         positions = client.get_all_positions()
         print(f"Found {len(positions)} open positions on exchange")
         
+        # Symbols with an open trade, built once instead of rescanning the
+        # trade history for every position
+        open_trade_symbols = {
+            t.get('symbol') for t in state.bot_state.trade_history
+            if t.get('status') == 'OPEN'
+        }
+        
         for position in positions:
             symbol = position.get('symbol')
             if not symbol:
                 continue
             
             # Check if there's already an open trade for this symbol
-            has_open_trade = any(
-                t.get('symbol') == symbol and t.get('status') == 'OPEN'
-                for t in state.bot_state.trade_history
-            )
-            
-            if not has_open_trade:
+            if symbol not in open_trade_symbols:
                 # Create a trade entry for this position
                 try:
                     position_amount = float(position.get('contracts', position.get('positionAmt', 0)) or 0)
@@ -445,8 +454,8 @@ def reconcile_existing_positions_with_trades(client):
                 
                 print(f"Creating trade entry for existing position: {symbol} {side}")
                 
-                # Get TP/SL from open orders if available
-                tp_sl_orders = client.get_tp_sl_orders_for_position(symbol)
+                # Get TP/SL from open orders if available (only recorded, so a recent snapshot is fine)
+                tp_sl_orders = client.get_tp_sl_orders_for_position(symbol, allow_cached=True)
                 tp_price = None
                 sl_price = None
                 
@@ -467,6 +476,7 @@ def reconcile_existing_positions_with_trades(client):
                     'stop_loss': sl_price,
                     'entry_time': None  # Unknown for existing positions
                 })
+                open_trade_symbols.add(symbol)
                 print(f"✓ Trade entry created for {symbol}")
         
         print(f"=== Position-Trade Reconciliation Complete ===\n")
@@ -493,6 +503,10 @@ def reconcile_all_positions_tp_sl(client):
         positions = client.get_all_positions()
         print(f"Found {len(positions)} open positions")
         
+        # One open-orders fetch for the whole pass; None means it failed and
+        # each position falls back to its own fetch
+        orders_by_symbol = client.get_open_orders_by_symbol() if positions else None
+        
         reconciled_count = 0
         failed_count = 0
         
@@ -508,7 +522,10 @@ def reconcile_all_positions_tp_sl(client):
             pending = state.get_pending_order(symbol)
             
             # Reconcile this position
-            success = reconcile_position_tp_sl(client, symbol, position, pending)
+            open_orders = None
+            if orders_by_symbol is not None:
+                open_orders = orders_by_symbol.get(normalize_symbol(symbol), [])
+            success = reconcile_position_tp_sl(client, symbol, position, pending, open_orders)
             if success:
                 reconciled_count += 1
             else:
@@ -528,6 +545,19 @@ def reconcile_all_positions_tp_sl(client):
             "message": "Error during position TP/SL reconciliation"
         })
 
+def _is_price_on_wrong_side(price, ref_price, tick_size, should_be_above):
+    """Check if price is on the wrong side of reference, accounting for tick tolerance."""
+    if not price:
+        return False
+    # If prices are effectively equal (within tolerance), they're not invalid
+    if order_utils.prices_are_equal(price, ref_price, tick_size):
+        return False
+    # Check if price is on wrong side
+    if should_be_above:
+        return price <= ref_price  # Should be above but isn't
+    else:
+        return price >= ref_price  # Should be below but isn't
+
 def monitor_and_close_positions(client):
     """Monitor open positions and force-close them if TP/SL levels are breached.
     
@@ -600,30 +630,17 @@ def monitor_and_close_positions(client):
                 # Use tick-tolerant comparisons to avoid false positives from rounding differences
                 tick_size = order_utils.fetch_symbol_tick_size(client, symbol)
                 
-                def is_price_on_wrong_side(price, ref_price, should_be_above):
-                    """Check if price is on the wrong side of reference, accounting for tick tolerance."""
-                    if not price:
-                        return False
-                    # If prices are effectively equal (within tolerance), they're not invalid
-                    if order_utils.prices_are_equal(price, ref_price, tick_size):
-                        return False
-                    # Check if price is on wrong side
-                    if should_be_above:
-                        return price <= ref_price  # Should be above but isn't
-                    else:
-                        return price >= ref_price  # Should be below but isn't
-                
                 if side == 'LONG':
                     # For LONG: TP should be above entry, SL should be below entry
-                    tp_invalid = is_price_on_wrong_side(take_profit, entry_price, should_be_above=True)
-                    sl_invalid = is_price_on_wrong_side(stop_loss, entry_price, should_be_above=False)
+                    tp_invalid = _is_price_on_wrong_side(take_profit, entry_price, tick_size, should_be_above=True)
+                    sl_invalid = _is_price_on_wrong_side(stop_loss, entry_price, tick_size, should_be_above=False)
                     if tp_invalid or sl_invalid:
                         log_tp_sl_inconsistent(position, entry_price, take_profit, stop_loss)
                         continue
                 elif side == 'SHORT':
                     # For SHORT: TP should be below entry, SL should be above entry
-                    tp_invalid = is_price_on_wrong_side(take_profit, entry_price, should_be_above=False)
-                    sl_invalid = is_price_on_wrong_side(stop_loss, entry_price, should_be_above=True)
+                    tp_invalid = _is_price_on_wrong_side(take_profit, entry_price, tick_size, should_be_above=False)
+                    sl_invalid = _is_price_on_wrong_side(stop_loss, entry_price, tick_size, should_be_above=True)
                     if tp_invalid or sl_invalid:
                         log_tp_sl_inconsistent(position, entry_price, take_profit, stop_loss)
                         continue
@@ -1,19 +1,32 @@
 import math
+import sys
 import time
-import datetime
-from datetime import timezone
+from dataclasses import dataclass
 from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 import logging
 import config
 import state
 
 logger = logging.getLogger(__name__)
 
-# Log throttling state: {(category, symbol): {"last_logged": datetime, "count": int}}
+
+@dataclass(slots=True)
+class _ThrottleEntry:
+    """Per (category, symbol) throttle record."""
+    last_logged: float  # time.monotonic() of the last emitted message
+    count: int = 0      # messages suppressed since then
+
+
+# Log throttling state: {category: {symbol: _ThrottleEntry}}
 _log_throttle_state = {}
 LOG_THROTTLE_INTERVAL_SECONDS = 60  # Minimum interval between repeated warnings
 
+# Conditional order types (casefolded) that carry a position's TP/SL
+TP_SL_ORDER_TYPES = frozenset({'stop_market', 'take_profit_market'})
 
+
+@lru_cache(maxsize=1024)
 def normalize_symbol(symbol):
     """Normalize symbol to canonical format for consistent lookups and comparisons.
     
@@ -21,19 +34,16 @@ def normalize_symbol(symbol):
     - "XRP/USDT" vs "XRP/USDT:USDT" (futures suffix)
     - Inconsistent casing
     
-    Returns the base symbol without futures suffix (e.g., "XRP/USDT").
+    Returns the base symbol without futures suffix (e.g., "XRP/USDT"),
+    interned so every caller shares one string object per symbol.
+    Memoized: the bot only ever sees a few dozen distinct symbols.
     """
     if not symbol:
         return symbol
     
-    # Uppercase for consistency
-    symbol = symbol.upper()
-    
-    # Strip futures suffix (e.g., ":USDT" from "XRP/USDT:USDT")
-    if ':' in symbol:
-        symbol = symbol.split(':')[0]
-    
-    return symbol
+    # Uppercase for consistency, then strip the futures suffix
+    # (e.g., ":USDT" from "XRP/USDT:USDT") without building a split list
+    return sys.intern(symbol.upper().partition(':')[0])
 
 
 def prices_are_equal(price1, price2, tick_size, tolerance_pct=0.001):
@@ -59,13 +69,41 @@ def prices_are_equal(price1, price2, tick_size, tolerance_pct=0.001):
         p1 = float(price1)
         p2 = float(price2)
         tick = float(tick_size) if tick_size and tick_size > 0 else 1e-8
+    except (TypeError, ValueError):
+        return False
+    
+    # Within tolerance if within one tick OR within the percentage band
+    # (equivalent to comparing against max(tick, pct_tolerance))
+    diff = abs(p1 - p2)
+    if diff <= tick:
+        return True
+    return diff <= max(abs(p1), abs(p2)) * tolerance_pct
+
+
+def order_quantity_matches(order, target_qty, qty_tolerance, _abs=abs, _float=float):
+    """Check if an order's amount matches the target quantity within a tolerance.
+    
+    Cheap checks run first: a missing order/amount fails immediately and an
+    exact match returns before any float conversion or arithmetic.
+    
+    Args:
+        order: Order dict (ccxt format, uses 'amount')
+        target_qty: Expected quantity (float)
+        qty_tolerance: Relative tolerance as decimal (e.g. 0.01 = 1%)
+        _abs, _float: Builtins bound as defaults for local (LOAD_FAST) access
         
-        # Use max of tick size or percentage tolerance
-        ref_price = max(abs(p1), abs(p2))
-        pct_tolerance = ref_price * tolerance_pct if ref_price > 0 else 0
-        tolerance = max(tick, pct_tolerance)
-        
-        return abs(p1 - p2) <= tolerance
+    Returns:
+        bool: True if the order quantity is within tolerance of target_qty
+    """
+    if not order:
+        return False
+    amount = order.get('amount')
+    if not amount:
+        return False
+    if amount == target_qty:
+        return True
+    try:
+        return _abs(_float(amount) - target_qty) <= target_qty * qty_tolerance
     except (TypeError, ValueError):
         return False
 
@@ -84,27 +122,29 @@ def should_log_throttled(category, symbol, interval_seconds=None):
     Returns:
         tuple: (should_log: bool, suppressed_count: int)
     """
-    global _log_throttle_state
-    
     interval = interval_seconds or LOG_THROTTLE_INTERVAL_SECONDS
-    key = (category, normalize_symbol(symbol) if symbol else "")
-    now = datetime.datetime.now(timezone.utc)
+    key = normalize_symbol(symbol) if symbol else ""
+    now = time.monotonic()
+    
+    bucket = _log_throttle_state.get(category)
+    if bucket is None:
+        bucket = _log_throttle_state[category] = {}
     
-    entry = _log_throttle_state.get(key)
+    entry = bucket.get(key)
     if entry is None:
         # First occurrence - should log
-        _log_throttle_state[key] = {"last_logged": now, "count": 0}
+        bucket[key] = _ThrottleEntry(now)
         return True, 0
     
-    elapsed = (now - entry["last_logged"]).total_seconds()
-    if elapsed >= interval:
+    if now - entry.last_logged >= interval:
         # Enough time passed - should log
-        suppressed = entry["count"]
-        _log_throttle_state[key] = {"last_logged": now, "count": 0}
+        suppressed = entry.count
+        entry.last_logged = now
+        entry.count = 0
         return True, suppressed
     else:
         # Throttled - don't log, increment counter
-        entry["count"] += 1
+        entry.count += 1
         return False, 0
 
 
@@ -191,8 +231,8 @@ def round_to_tick(value, tick_size):
 
 def set_backoff(symbol, seconds=None):
     seconds = seconds or config.TP_SL_PENDING_BACKOFF_SECONDS
-    expires = datetime.datetime.now(timezone.utc) + datetime.timedelta(seconds=seconds)
-    state.bot_state.tp_sl_backoff[symbol] = {"until": expires.isoformat(), "logged": False}
+    # "until" is a time.monotonic() deadline; backoff state is never persisted
+    state.bot_state.tp_sl_backoff[symbol] = {"until": time.monotonic() + seconds, "logged": False}
 
 
 def check_backoff(symbol):
@@ -200,14 +240,13 @@ def check_backoff(symbol):
     if not entry:
         return False, 0
     try:
-        expires = datetime.datetime.fromisoformat(entry["until"])
-    except Exception:
-        del state.bot_state.tp_sl_backoff[symbol]
+        remaining = entry["until"] - time.monotonic()
+    except (KeyError, TypeError):
+        state.bot_state.tp_sl_backoff.pop(symbol, None)
         return False, 0
-    remaining = (expires - datetime.datetime.now(timezone.utc)).total_seconds()
     if remaining > 0:
         return True, remaining
-    del state.bot_state.tp_sl_backoff[symbol]
+    state.bot_state.tp_sl_backoff.pop(symbol, None)
     return False, 0
 
 
@@ -223,11 +262,11 @@ def safe_place_tp_sl(client, symbol, is_long, amount, computed_tp, computed_sl,
     """Place TP/SL with price pre-checks, rounding, buffer and fallback."""
     in_backoff, remaining = check_backoff(symbol)
     if in_backoff:
-        entry = state.bot_state.tp_sl_backoff.get(symbol, {})
-        if not entry.get("logged"):
+        # Log once per backoff window; the entry is updated in place
+        entry = state.bot_state.tp_sl_backoff.get(symbol)
+        if entry is not None and not entry["logged"]:
             print(f"Skipping TP/SL for {symbol} due to backoff ({int(remaining)}s remaining)")
             entry["logged"] = True
-            state.bot_state.tp_sl_backoff[symbol] = entry
         return False
 
     current_price = fetch_mark_price(client, symbol)
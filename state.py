@@ -1,14 +1,29 @@
-from typing import List, Dict, Any
-from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field, fields
+import atexit
 import datetime
 import json
 import os
+import queue
+import sys
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
 
 # Configuration constants
 MAX_BALANCE_HISTORY_POINTS = 5000  # About 17 days at 5-minute intervals (enough for 2+ weeks)
 MAX_RECONCILIATION_LOG_ENTRIES = 50  # Maximum entries in reconciliation log
+EXIT_PRICE_WARNING_INTERVAL_SECONDS = 60  # Minimum interval between repeated exit-price fallback warnings
 
-@dataclass
+# Numeric fields normalised to float when records enter the state
+PENDING_ORDER_FLOAT_FIELDS = ('entry_price', 'stop_loss', 'take_profit', 'quantity')
+TRADE_FLOAT_FIELDS = ('entry_price', 'exit_price', 'size', 'pnl')
+
+@dataclass(slots=True)
 class Metrics:
     """Metrics for tracking order activities"""
     pending_orders_count: int = 0
@@ -30,16 +45,39 @@ class BotState:
     trade_history: List[Dict] = field(default_factory=list)
     total_pnl: float = 0.0
     pending_orders: Dict[str, Dict] = field(default_factory=dict) # symbol -> order info with TP/SL params (bot-tracked)
-    exchange_open_orders: List[Dict] = field(default_factory=list) # Actual open orders from exchange
+    exchange_open_orders: Dict[tuple, Dict] = field(default_factory=dict) # (symbol, order_id) -> actual open order from exchange
+    open_orders_by_symbol: Dict[str, List[Dict]] = field(default_factory=dict) # symbol -> its open orders, in exchange order
     orphaned_orders: List[Dict] = field(default_factory=list) # Orders found on exchange but not in state
     reconciliation_log: List[Dict] = field(default_factory=list) # Log of reconciliation actions
     metrics: Metrics = field(default_factory=Metrics)
     balance_history: List[Dict] = field(default_factory=list) # Portfolio balance over time
     tp_sl_backoff: Dict[str, Dict] = field(default_factory=dict) # symbol -> backoff expiry/log status
 
+    @property
+    def exchange_open_orders_list(self) -> List[Dict]:
+        """Exchange open orders as a plain list (for API responses)."""
+        return list(self.exchange_open_orders.values())
+
 # Global instance
 bot_state = BotState()
 
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def _json_loads(data):
+    """Parse JSON from bytes or str, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def update_balance(balance: float):
     bot_state.balance = balance
     bot_state.last_update = datetime.datetime.now().isoformat()
@@ -68,16 +106,28 @@ def update_full_balance(total: float, free: float, used: float):
     # Save balance history to disk
     save_balance_history()
     
-def update_exchange_open_orders(orders: List[Dict]):
+def update_exchange_open_orders(orders: List[Dict], target: Optional[BotState] = None):
     """Update the list of open orders from the exchange.
     
-    Transforms ccxt order format to a frontend-friendly format.
+    Transforms ccxt order format to a frontend-friendly format and indexes
+    the result by (symbol, order_id), with a per-symbol index for lookups.
+    Orders without an id are keyed by their position in the exchange list
+    so they cannot overwrite each other.
+    
+    Args:
+        orders: Open orders in ccxt format
+        target: BotState to update (defaults to the global bot_state)
     """
-    formatted_orders = []
-    for order in orders:
+    if target is None:
+        target = bot_state
+    formatted_orders = {}
+    orders_by_symbol = {}
+    for position, order in enumerate(orders):
+        # Interned so every index keyed on the symbol shares one string object
+        symbol = sys.intern(order.get('symbol') or '')
         formatted_order = {
             'order_id': order.get('id', ''),
-            'symbol': order.get('symbol', ''),
+            'symbol': symbol,
             'type': order.get('type', ''),
             'side': order.get('side', '').upper(),
             'price': float(order.get('price', 0) or 0),
@@ -89,10 +139,19 @@ def update_exchange_open_orders(orders: List[Dict]):
             'reduce_only': order.get('reduceOnly', False),
             'stop_price': float(order.get('stopPrice', 0) or 0) if order.get('stopPrice') else None
         }
-        formatted_orders.append(formatted_order)
+        formatted_orders[(symbol, formatted_order['order_id'] or position)] = formatted_order
+        # Keep exchange order so the last TP/SL order wins, as with the plain list
+        orders_by_symbol.setdefault(symbol, []).append(formatted_order)
     
-    bot_state.exchange_open_orders = formatted_orders
-    bot_state.metrics.open_exchange_orders_count = len(formatted_orders)
+    target.exchange_open_orders = formatted_orders
+    target.open_orders_by_symbol = orders_by_symbol
+    target.metrics.open_exchange_orders_count = len(formatted_orders)
+
+def iter_open_orders_for_symbol(symbol: str, target: Optional[BotState] = None):
+    """Yield cached exchange open orders for a single symbol, in exchange order."""
+    if target is None:
+        target = bot_state
+    yield from target.open_orders_by_symbol.get(symbol, ())
 
 def update_order_blocks(symbol: str, obs: List[Dict]):
     # Convert timestamps to string if needed or keep as is
@@ -127,6 +186,9 @@ def update_position(symbol: str, position: Dict):
     ccxt unified format uses: 'contracts', 'entryPrice', 'markPrice', 'unrealizedPnl', 'side'
     Binance raw format uses: 'positionAmt', 'entryPrice', 'markPrice', 'unRealizedProfit'
     """
+    if symbol:
+        # Positions are re-keyed every loop; intern so lookups share one object
+        symbol = sys.intern(symbol)
     had_position = symbol in bot_state.positions
     old_position = bot_state.positions.get(symbol) if had_position else None
     
@@ -221,7 +283,15 @@ def _normalize_order_field(order: Dict, field_name: str, fallback_name: str = No
     return value
 
 
-def compute_position_tp_sl(symbol: str, exchange_open_orders: List[Dict]) -> Dict:
+# TP/SL order type -> result key, in both raw Binance (upper) and ccxt (lower) spelling
+_TP_SL_RESULT_KEY = {
+    'STOP_MARKET': 'stop_loss',
+    'stop_market': 'stop_loss',
+    'TAKE_PROFIT_MARKET': 'take_profit',
+    'take_profit_market': 'take_profit',
+}
+
+def compute_position_tp_sl(symbol: str, exchange_open_orders: List[Dict], assume_filtered: bool = False) -> Dict:
     """Compute TP/SL for a position by deriving from exchange open orders.
     
     This function looks for STOP_MARKET and TAKE_PROFIT_MARKET orders
@@ -229,43 +299,45 @@ def compute_position_tp_sl(symbol: str, exchange_open_orders: List[Dict]) -> Dic
     
     Args:
         symbol: Trading symbol
-        exchange_open_orders: List of open orders from the exchange
+        exchange_open_orders: Open orders from the exchange (any iterable)
+        assume_filtered: Skip the per-order symbol check when the caller
+            already passes only this symbol's orders
         
     Returns:
         dict: {'take_profit': float or None, 'stop_loss': float or None}
     """
-    take_profit = None
-    stop_loss = None
+    result = {'take_profit': None, 'stop_loss': None}
     
     for order in exchange_open_orders:
-        if order.get('symbol') != symbol:
+        if not assume_filtered and order.get('symbol') != symbol:
             continue
         
-        order_type = order.get('type', '').upper()
-        is_reduce_only = _normalize_order_field(order, 'reduceOnly', 'reduce_only')
-        
-        # Check if it's a TP/SL order
-        if is_reduce_only or order_type in ['STOP_MARKET', 'TAKE_PROFIT_MARKET']:
-            stop_price = _normalize_order_field(order, 'stopPrice', 'stop_price')
-            if stop_price:
-                stop_price = float(stop_price)
-                
-                if order_type == 'STOP_MARKET':
-                    stop_loss = stop_price
-                elif order_type == 'TAKE_PROFIT_MARKET':
-                    take_profit = stop_price
+        # Only the order type decides SL vs TP; reduce-only LIMIT orders and
+        # the like never carry a position's TP/SL
+        key = _TP_SL_RESULT_KEY.get(order.get('type'))
+        if key is None:
+            continue
+        stop_price = _normalize_order_field(order, 'stopPrice', 'stop_price')
+        if stop_price:
+            result[key] = float(stop_price)
     
-    return {'take_profit': take_profit, 'stop_loss': stop_loss}
+    return result
 
 
-def enrich_positions_with_tp_sl():
+def enrich_positions_with_tp_sl(target: Optional[BotState] = None):
     """Enrich all positions with TP/SL derived from exchange open orders.
     
     This should be called after updating exchange_open_orders to ensure
-    position data includes current TP/SL information.
+    position data includes current TP/SL information. Only the orders
+    indexed under each position's symbol are scanned.
+    
+    Args:
+        target: BotState to enrich (defaults to the global bot_state)
     """
-    for symbol, position in bot_state.positions.items():
-        tp_sl = compute_position_tp_sl(symbol, bot_state.exchange_open_orders)
+    if target is None:
+        target = bot_state
+    for symbol, position in target.positions.items():
+        tp_sl = compute_position_tp_sl(symbol, iter_open_orders_for_symbol(symbol, target), assume_filtered=True)
         
         # Update position with derived TP/SL
         if tp_sl['take_profit'] is not None:
@@ -274,6 +346,25 @@ def enrich_positions_with_tp_sl():
             position['stop_loss'] = tp_sl['stop_loss']
 
 
+# Warning sink for trade-closure messages (swappable for a logger or in tests)
+_warn = print
+
+# symbol -> [last warned (time.monotonic()), warnings suppressed since]
+_exit_price_fallback_warnings: Dict[str, List] = {}
+
+def _warn_exit_price_fallback(symbol: str):
+    """Warn that entry_price stood in for exit_price, throttled per symbol."""
+    now = time.monotonic()
+    entry = _exit_price_fallback_warnings.get(symbol)
+    if entry is not None and now - entry[0] < EXIT_PRICE_WARNING_INTERVAL_SECONDS:
+        entry[1] += 1
+        return
+    msg = f"Warning: Using entry_price as exit_price fallback for {symbol}"
+    if entry is not None and entry[1] > 0:
+        msg += f" [repeated {entry[1]} times in last {EXIT_PRICE_WARNING_INTERVAL_SECONDS}s]"
+    _exit_price_fallback_warnings[symbol] = [now, 0]
+    _warn(msg)
+
 def _close_trade_in_history(symbol: str, old_position: Dict):
     """Find and update the open trade for this symbol with exit information.
     
@@ -293,7 +384,7 @@ def _close_trade_in_history(symbol: str, old_position: Dict):
             if exit_price == 0:
                 exit_price = old_position.get('entry_price', 0)
                 if exit_price > 0:
-                    print(f"Warning: Using entry_price as exit_price fallback for {symbol}")
+                    _warn_exit_price_fallback(symbol)
             
             entry_price = trade.get('entry_price', old_position.get('entry_price', 0))
             size = trade.get('size', old_position.get('size', 0))
@@ -315,17 +406,30 @@ def _close_trade_in_history(symbol: str, old_position: Dict):
             # Update total PnL
             bot_state.total_pnl += pnl
             
-            # Save trade history after closing a trade
-            save_trade_history()
+            # Persist the closed trade (supersedes its OPEN record on load)
+            _append_trade_record(trade)
             
             print(f"Trade closed for {symbol}: PnL = {pnl:.2f} USDT")
             break
 
+def _coerce_float_fields(record: Dict, fields):
+    """Convert numeric fields (str, int, numpy scalars) to plain floats in place."""
+    for name in fields:
+        value = record.get(name)
+        if value is not None and type(value) is not float:
+            try:
+                record[name] = float(value)
+            except (TypeError, ValueError):
+                pass
+
 def add_trade(trade: Dict):
     """Add a trade to history"""
+    if trade.get('symbol'):
+        trade['symbol'] = sys.intern(trade['symbol'])
+    _coerce_float_fields(trade, TRADE_FLOAT_FIELDS)
     trade['timestamp'] = datetime.datetime.now().isoformat()
     bot_state.trade_history.insert(0, trade)
-    save_trade_history()
+    _append_trade_record(trade)
 
 def update_total_pnl(pnl: float):
     """Update total PnL"""
@@ -333,6 +437,8 @@ def update_total_pnl(pnl: float):
 
 def add_pending_order(symbol: str, order_id: str, params: Dict):
     """Track a pending limit order with its intended TP/SL parameters"""
+    symbol = sys.intern(symbol)
+    _coerce_float_fields(params, PENDING_ORDER_FLOAT_FIELDS)
     bot_state.pending_orders[symbol] = {
         'order_id': order_id,
         'params': params,
@@ -343,8 +449,7 @@ def add_pending_order(symbol: str, order_id: str, params: Dict):
 
 def remove_pending_order(symbol: str):
     """Remove a pending order once processed"""
-    if symbol in bot_state.pending_orders:
-        del bot_state.pending_orders[symbol]
+    if bot_state.pending_orders.pop(symbol, None) is not None:
         bot_state.metrics.pending_orders_count = len(bot_state.pending_orders)
         save_pending_orders()
 
@@ -355,15 +460,72 @@ def get_pending_order(symbol: str):
 # Persistence functions
 PENDING_ORDERS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'pending_orders.json')
 METRICS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'metrics.json')
-TRADE_HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'trade_history.json')
+TRADE_HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'trade_history.jsonl')  # JSON lines, oldest first
+LEGACY_TRADE_HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'trade_history.json')  # JSON array, migrated on load
 BALANCE_HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'balance_history.json')
 
+# Background persistence: metrics snapshots are queued as (path, data) and
+# written by a daemon thread, so callers on the trading loop never block on
+# disk I/O. Every other state file is written synchronously by its caller.
+WRITE_BATCH_SIZE = 64
+_write_queue = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+def _write_batch(batch):
+    """Coalesce a batch of queued writes into one write per file.
+    
+    Each queued write is a full snapshot, so only the latest one per file
+    is written.
+    """
+    pending = {}
+    for path, data in batch:
+        pending[path] = data
+    for path, data in pending.items():
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"WARNING: Failed to write {path}: {e}")
+
+def _persistence_writer():
+    while True:
+        batch = [_write_queue.get()]
+        try:
+            while len(batch) < WRITE_BATCH_SIZE:
+                batch.append(_write_queue.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            _write_batch(batch)
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
+
+def _enqueue_write(path: str, data: bytes):
+    """Queue a file write for the background writer thread."""
+    global _writer_thread
+    if _writer_thread is None:
+        with _writer_lock:
+            if _writer_thread is None:
+                _writer_thread = threading.Thread(target=_persistence_writer, name="state-writer", daemon=True)
+                _writer_thread.start()
+    _write_queue.put((path, data))
+
+def flush_writes():
+    """Block until all queued metrics writes are on disk."""
+    if _writer_thread is not None:
+        _write_queue.join()
+
+atexit.register(flush_writes)
+
 def save_pending_orders():
     """Save pending orders to disk"""
     try:
         os.makedirs(os.path.dirname(PENDING_ORDERS_FILE), exist_ok=True)
-        with open(PENDING_ORDERS_FILE, 'w') as f:
-            json.dump(bot_state.pending_orders, f, indent=2)
+        with open(PENDING_ORDERS_FILE, 'wb') as f:
+            f.write(_json_dumps(bot_state.pending_orders, indent=True))
     except Exception as e:
         print(f"WARNING: Failed to save pending orders: {e}")
 
@@ -371,8 +533,8 @@ def load_pending_orders_on_startup():
     """Load pending orders from disk"""
     try:
         if os.path.exists(PENDING_ORDERS_FILE):
-            with open(PENDING_ORDERS_FILE, 'r') as f:
-                loaded = json.load(f)
+            with open(PENDING_ORDERS_FILE, 'rb') as f:
+                loaded = _json_loads(f.read())
                 bot_state.pending_orders = loaded
                 bot_state.metrics.pending_orders_count = len(loaded)
                 print(f"Loaded {len(loaded)} pending orders from disk")
@@ -411,7 +573,6 @@ def add_forced_closure_log(symbol: str, reason: str, details: Dict):
 def save_metrics():
     """Save metrics to disk"""
     try:
-        os.makedirs(os.path.dirname(METRICS_FILE), exist_ok=True)
         metrics_data = {
             'pending_orders_count': bot_state.metrics.pending_orders_count,
             'open_exchange_orders_count': bot_state.metrics.open_exchange_orders_count,
@@ -419,17 +580,17 @@ def save_metrics():
             'cancelled_orders_count': bot_state.metrics.cancelled_orders_count,
             'filled_orders_count': bot_state.metrics.filled_orders_count
         }
-        with open(METRICS_FILE, 'w') as f:
-            json.dump(metrics_data, f, indent=2)
+        _enqueue_write(METRICS_FILE, _json_dumps(metrics_data, indent=True))
     except Exception as e:
         print(f"WARNING: Failed to save metrics: {e}")
 
 def load_metrics_on_startup():
     """Load metrics from disk"""
+    flush_writes()
     try:
         if os.path.exists(METRICS_FILE):
-            with open(METRICS_FILE, 'r') as f:
-                loaded = json.load(f)
+            with open(METRICS_FILE, 'rb') as f:
+                loaded = _json_loads(f.read())
                 bot_state.metrics.pending_orders_count = loaded.get('pending_orders_count', 0)
                 bot_state.metrics.open_exchange_orders_count = loaded.get('open_exchange_orders_count', 0)
                 bot_state.metrics.placed_orders_count = loaded.get('placed_orders_count', 0)
@@ -443,34 +604,110 @@ def load_metrics_on_startup():
     except Exception as e:
         print(f"WARNING: Failed to load metrics: {e}")
 
+def _trade_key(trade: Dict):
+    """Identity of a trade record across appended updates."""
+    return (trade.get('symbol'), trade.get('timestamp'))
+
+def _append_trade_record(trade: Dict):
+    """Append a single trade record to the trade history file.
+    
+    Trades are written as JSON lines, so each add/close costs one line of
+    I/O instead of rewriting the whole history. A later record with the
+    same symbol and timestamp supersedes the earlier one on load.
+    """
+    try:
+        os.makedirs(os.path.dirname(TRADE_HISTORY_FILE), exist_ok=True)
+        with open(TRADE_HISTORY_FILE, 'ab') as f:
+            f.write(_json_dumps(trade) + b'\n')
+    except Exception as e:
+        print(f"WARNING: Failed to append trade history: {e}")
+
 def save_trade_history():
-    """Save trade history to disk"""
+    """Rewrite the trade history file as compacted JSON lines"""
     try:
+        data = b''.join(_json_dumps(trade) + b'\n' for trade in reversed(bot_state.trade_history))
         os.makedirs(os.path.dirname(TRADE_HISTORY_FILE), exist_ok=True)
-        with open(TRADE_HISTORY_FILE, 'w') as f:
-            json.dump(bot_state.trade_history, f, indent=2)
+        with open(TRADE_HISTORY_FILE, 'wb') as f:
+            f.write(data)
     except Exception as e:
         print(f"WARNING: Failed to save trade history: {e}")
 
+def _read_trade_lines(f):
+    """Parse a JSON-lines trade history file.
+    
+    Returns (records, truncated). A last line that does not decode, as left
+    by a write cut off mid-line, is skipped with a warning and reported as
+    truncated; an undecodable line anywhere else still raises.
+    """
+    records = []
+    error = None
+    for line in f:
+        if not line.strip():
+            continue
+        if error is not None:
+            raise error
+        try:
+            records.append(_json_loads(line))
+        except (ValueError, UnicodeDecodeError) as e:
+            error = e
+    if error is not None:
+        print(f"WARNING: Skipping truncated last line of trade history file: {error}")
+    return records, error is not None
+
+def _migrate_legacy_trade_history():
+    """Convert a JSON array trade history file to the JSON lines file.
+    
+    The array is stored most recent first; the lines file is oldest first.
+    The old file is renamed to *.migrated so the conversion runs only once.
+    """
+    with open(LEGACY_TRADE_HISTORY_FILE, 'rb') as f:
+        trades = _json_loads(f.read())
+    os.makedirs(os.path.dirname(TRADE_HISTORY_FILE), exist_ok=True)
+    with open(TRADE_HISTORY_FILE, 'wb') as f:
+        f.write(b''.join(_json_dumps(trade) + b'\n' for trade in reversed(trades)))
+    os.replace(LEGACY_TRADE_HISTORY_FILE, LEGACY_TRADE_HISTORY_FILE + '.migrated')
+    print(f"Migrated {len(trades)} trades from {LEGACY_TRADE_HISTORY_FILE} to {TRADE_HISTORY_FILE}")
+
 def load_trade_history_on_startup():
-    """Load trade history from disk"""
+    """Load trade history from disk
+    
+    Reads JSON lines in a single pass and compacts the file afterwards. A
+    truncated last line is dropped and rewritten out of the file. An older
+    JSON array file is migrated to JSON lines first.
+    """
     try:
+        if not os.path.exists(TRADE_HISTORY_FILE) and os.path.exists(LEGACY_TRADE_HISTORY_FILE):
+            _migrate_legacy_trade_history()
         if os.path.exists(TRADE_HISTORY_FILE):
-            with open(TRADE_HISTORY_FILE, 'r') as f:
-                loaded = json.load(f)
-                bot_state.trade_history = loaded
-                # Recalculate total P&L from closed trades
-                total = 0.0
-                for trade in loaded:
-                    if trade.get('status') == 'CLOSED' and trade.get('pnl') is not None:
-                        try:
-                            pnl_value = float(trade['pnl'])
-                            total += pnl_value
-                        except (ValueError, TypeError) as e:
-                            print(f"WARNING: Invalid P&L value in trade {trade.get('symbol', 'unknown')}: {e}")
-                            continue
-                bot_state.total_pnl = total
-                print(f"Loaded {len(loaded)} trades from disk, total P&L: {total:.2f}")
+            trades = []
+            positions = {}
+            with open(TRADE_HISTORY_FILE, 'rb') as f:
+                records, needs_compaction = _read_trade_lines(f)
+                for trade in records:
+                    key = _trade_key(trade)
+                    index = positions.get(key)
+                    if index is None:
+                        positions[key] = len(trades)
+                        trades.append(trade)
+                    else:
+                        trades[index] = trade
+                        needs_compaction = True
+            trades.reverse()
+            bot_state.trade_history = trades
+            # Recalculate total P&L from closed trades
+            total = 0.0
+            for trade in trades:
+                if trade.get('status') == 'CLOSED' and trade.get('pnl') is not None:
+                    try:
+                        pnl_value = float(trade['pnl'])
+                        total += pnl_value
+                    except (ValueError, TypeError) as e:
+                        print(f"WARNING: Invalid P&L value in trade {trade.get('symbol', 'unknown')}: {e}")
+                        continue
+            bot_state.total_pnl = total
+            if needs_compaction:
+                save_trade_history()
+            print(f"Loaded {len(trades)} trades from disk, total P&L: {total:.2f}")
         else:
             print("No trade history file found, starting fresh")
     except json.JSONDecodeError as e:
@@ -488,8 +725,8 @@ def save_balance_history():
         if not os.path.exists(data_dir):
             os.makedirs(data_dir, exist_ok=True)
         
-        with open(BALANCE_HISTORY_FILE, 'w') as f:
-            json.dump(bot_state.balance_history, f, indent=2)
+        with open(BALANCE_HISTORY_FILE, 'wb') as f:
+            f.write(_json_dumps(bot_state.balance_history, indent=True))
     except Exception as e:
         print(f"WARNING: Failed to save balance history: {e}")
 
@@ -497,8 +734,8 @@ def load_balance_history_on_startup():
     """Load balance history from disk"""
     try:
         if os.path.exists(BALANCE_HISTORY_FILE):
-            with open(BALANCE_HISTORY_FILE, 'r') as f:
-                loaded = json.load(f)
+            with open(BALANCE_HISTORY_FILE, 'rb') as f:
+                loaded = _json_loads(f.read())
                 bot_state.balance_history = loaded
                 print(f"Loaded {len(loaded)} balance history entries from disk")
         else:
@@ -510,6 +747,19 @@ def load_balance_history_on_startup():
         print(f"WARNING: Failed to load balance history: {e}")
         bot_state.balance_history = []
 
+def reset_for_tests():
+    """Reset bot_state to empty values, clearing containers in place."""
+    bot_state.positions.clear()
+    bot_state.pending_orders.clear()
+    bot_state.exchange_open_orders.clear()
+    bot_state.open_orders_by_symbol.clear()
+    bot_state.reconciliation_log.clear()
+    bot_state.trade_history.clear()
+    bot_state.tp_sl_backoff.clear()
+    bot_state.total_pnl = 0.0
+    for metric in fields(Metrics):
+        setattr(bot_state.metrics, metric.name, metric.default)
+
 def init():
     """Initialize state on startup"""
     print("Initializing bot state...")
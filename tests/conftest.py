@@ -0,0 +1,137 @@
+"""
+Shared pytest configuration for the HunterZ test suite.
+"""
+import copy
+import datetime
+import os
+import sys
+import types
+from unittest.mock import MagicMock
+
+import pytest
+
+# Make the repository root importable once for the whole session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _install_fake_ccxt():
+    """Register a minimal ccxt stand-in so tests never load the real package.
+    
+    Only the names execution.py touches are provided: the binance exchange
+    class (a MagicMock) and the BaseError / RateLimitExceeded hierarchy.
+    """
+    fake = types.ModuleType("ccxt")
+    fake.BaseError = type("BaseError", (Exception,), {})
+    fake.RateLimitExceeded = type("RateLimitExceeded", (fake.BaseError,), {})
+    fake.binance = MagicMock(name="ccxt.binance")
+    sys.modules["ccxt"] = fake
+
+
+if "ccxt" not in sys.modules:
+    _install_fake_ccxt()
+
+# Core bot modules shared by most test files; imported once at collection
+import config  # noqa: E402
+import execution  # noqa: E402
+import order_utils  # noqa: E402
+import state  # noqa: E402
+
+
+# Pristine bot_state taken at import, before any test has touched it
+_BOT_STATE_SNAPSHOT = copy.deepcopy(state.bot_state.__dict__)
+
+
+@pytest.fixture(autouse=True)
+def _reset_bot_state():
+    """Start every test from a pristine bot_state and empty log throttles.
+    
+    Every field, the Metrics instance included, is restored from a deep copy
+    of the snapshot, so no test shares containers with another.
+    """
+    state.bot_state.__dict__.update(copy.deepcopy(_BOT_STATE_SNAPSHOT))
+    order_utils._log_throttle_state.clear()
+    state._exit_price_fallback_warnings.clear()
+    yield
+
+
+class FrozenClock:
+    """Deterministic stand-in for time.monotonic(); move it with advance()."""
+
+    # Wall-clock time reported by now() when the clock reads zero
+    WALL_EPOCH = datetime.datetime(2024, 1, 1)
+
+    def __init__(self, start=1000.0):
+        self.current = start
+
+    def monotonic(self):
+        return self.current
+
+    def now(self, tz=None):
+        """UTC wall-clock time on this clock (naive unless tz is given)."""
+        wall = self.WALL_EPOCH + datetime.timedelta(seconds=self.current)
+        if tz is None:
+            return wall
+        return wall.replace(tzinfo=datetime.timezone.utc).astimezone(tz)
+
+    def advance(self, seconds):
+        self.current += seconds
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    """Freeze time.monotonic(), as seen by order_utils log throttling.
+    
+    Only monotonic is replaced; the rest of the time module stays real.
+    """
+    clock = FrozenClock()
+    monkeypatch.setattr(order_utils.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def frozen_datetime(monkeypatch, frozen_now):
+    """Also drive datetime.datetime.now() from the frozen_now clock.
+    
+    state and main call datetime.datetime.now() through the module, so both
+    see the frozen time; advancing frozen_now moves it.
+    """
+    class _FrozenDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen_now.now(tz)
+
+    monkeypatch.setattr(datetime, "datetime", _FrozenDatetime)
+    return frozen_now
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_data_files(tmp_path_factory):
+    """Point state persistence at a per-session temp dir instead of data/.
+    
+    Keeps test runs from touching the bot's real files and lets parallel
+    (pytest-xdist) workers run without sharing anything on disk.
+    """
+    data_dir = tmp_path_factory.mktemp("data")
+    names = ("PENDING_ORDERS_FILE", "METRICS_FILE", "TRADE_HISTORY_FILE", "LEGACY_TRADE_HISTORY_FILE",
+             "BALANCE_HISTORY_FILE")
+    saved = {name: getattr(state, name) for name in names}
+    for name, path in saved.items():
+        setattr(state, name, str(data_dir / os.path.basename(path)))
+    yield
+    state.flush_writes()
+    for name, path in saved.items():
+        setattr(state, name, path)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_rate_limit_delays():
+    """Zero the wall-clock delays used for exchange rate limiting.
+    
+    Forced closures sleep FORCED_CLOSURE_RATE_LIMIT_DELAY between positions and
+    rate-limit bans sleep BAN_SLEEP_SECONDS; neither is meaningful against mocks.
+    """
+    saved = (config.FORCED_CLOSURE_RATE_LIMIT_DELAY, execution.BAN_SLEEP_SECONDS)
+    config.FORCED_CLOSURE_RATE_LIMIT_DELAY = 0
+    execution.BAN_SLEEP_SECONDS = 0
+    yield
+    config.FORCED_CLOSURE_RATE_LIMIT_DELAY, execution.BAN_SLEEP_SECONDS = saved
@@ -1,7 +1,8 @@
 """
 Test runner for HunterZ Trading Bot
 
-This script runs all tests for the TP/SL management functionality.
+This script runs all tests for the TP/SL management functionality via pytest,
+which also picks up tests/conftest.py and the pytest-style test modules.
 
 Usage:
     python run_tests.py                    # Run all tests
@@ -9,11 +10,11 @@ Usage:
     python run_tests.py test_tp_sl_*       # Run specific test file(s)
 """
 import sys
-import unittest
 import os
+import glob
+
+import pytest
 
-# Add parent directory to path to allow imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def run_tests(verbosity=2, pattern='test_*.py'):
     """
@@ -24,17 +25,16 @@ def run_tests(verbosity=2, pattern='test_*.py'):
         pattern: Pattern to match test files
     
     Returns:
-        unittest.TestResult object
+        int: pytest exit code (0 on success)
     """
-    # Discover and run tests
-    loader = unittest.TestLoader()
     start_dir = os.path.dirname(os.path.abspath(__file__))
-    suite = loader.discover(start_dir, pattern=pattern)
-    
-    runner = unittest.TextTestRunner(verbosity=verbosity)
-    result = runner.run(suite)
+    paths = sorted(glob.glob(os.path.join(start_dir, pattern)))
+    if not paths:
+        print(f"No test files match pattern: {pattern}")
+        return 1
     
-    return result
+    args = {1: ['-q'], 2: [], 3: ['-v']}.get(verbosity, [])
+    return pytest.main(args + paths)
 
 
 if __name__ == '__main__':
@@ -58,7 +58,7 @@ if __name__ == '__main__':
     print(f"Verbosity: {verbosity}")
     print("-" * 70)
     
-    result = run_tests(verbosity=verbosity, pattern=pattern)
+    exit_code = run_tests(verbosity=verbosity, pattern=pattern)
     
     # Exit with appropriate code
-    sys.exit(0 if result.wasSuccessful() else 1)
+    sys.exit(0 if exit_code == 0 else 1)
@@ -2,35 +2,56 @@
 Unit tests for active TP/SL monitoring functionality
 """
 import unittest
-from unittest.mock import Mock, MagicMock, patch, call
-import sys
-import os
-
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from unittest.mock import Mock, patch
 
 import state
 import config
+from execution import BinanceClient
 from main import monitor_and_close_positions
 
 
+class _FakeExchange:
+    """ccxt exchange surface used by the monitor: no market metadata, identity precision."""
+    markets = {}
+
+    def load_markets(self):
+        return self.markets
+
+    def amount_to_precision(self, symbol, amount):
+        return amount
+
+
+class _FakeClient:
+    """Hand-rolled BinanceClient stand-in that records cancels and closes."""
+
+    def __init__(self):
+        self.exchange = _FakeExchange()
+        self.tp_sl_orders = {'sl_order': None, 'tp_order': None}
+        self.close_results = []  # per-call results; exceptions are raised
+        self.cancel_calls = []
+        self.close_calls = []
+
+    def get_tp_sl_orders_for_position(self, symbol):
+        return self.tp_sl_orders
+
+    def cancel_order(self, symbol, order_id):
+        self.cancel_calls.append((symbol, order_id))
+        return True
+
+    def close_position_market(self, symbol, side, amount, reason="forced_closure"):
+        self.close_calls.append((symbol, side, amount, reason))
+        result = self.close_results.pop(0) if self.close_results else {'id': '12345'}
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
 class TestActiveMonitoring(unittest.TestCase):
     """Test active TP/SL monitoring logic"""
     
     def setUp(self):
-        """Set up test fixtures"""
-        # Reset bot state before each test
-        state.bot_state.positions = {}
-        state.bot_state.exchange_open_orders = []
-        state.bot_state.reconciliation_log = []
-        
-        # Create mock client
-        self.mock_client = Mock()
-        self.mock_client.exchange = Mock()
-        self.mock_client.exchange.amount_to_precision = Mock(side_effect=lambda s, a: a)
-        self.mock_client.get_tp_sl_orders_for_position = Mock(return_value={'sl_order': None, 'tp_order': None})
-        self.mock_client.cancel_order = Mock(return_value=True)
-        self.mock_client.close_position_market = Mock(return_value={'id': '12345'})
+        """Start each test with a fresh fake client"""
+        self.client = _FakeClient()
     
     def test_monitoring_disabled(self):
         """Test that monitoring is skipped when disabled"""
@@ -47,10 +68,10 @@ class TestActiveMonitoring(unittest.TestCase):
                 }
             }
             
-            monitor_and_close_positions(self.mock_client)
+            monitor_and_close_positions(self.client)
             
             # Should not close any positions
-            self.mock_client.close_position_market.assert_not_called()
+            self.assertEqual(self.client.close_calls, [])
     
     def test_long_position_tp_breach(self):
         """Test closing LONG position when TP is breached"""
@@ -66,12 +87,10 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should close with sell order
-        self.mock_client.close_position_market.assert_called_once_with(
-            'BTC/USDT', 'sell', 0.01, 'tp_breach'
-        )
+        self.assertEqual(self.client.close_calls, [('BTC/USDT', 'sell', 0.01, 'tp_breach')])
         
         # Should log the forced closure
         self.assertEqual(len(state.bot_state.reconciliation_log), 1)
@@ -93,12 +112,10 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should close with sell order
-        self.mock_client.close_position_market.assert_called_once_with(
-            'ETH/USDT', 'sell', 1.0, 'sl_breach'
-        )
+        self.assertEqual(self.client.close_calls, [('ETH/USDT', 'sell', 1.0, 'sl_breach')])
         
         # Should log the forced closure
         log_entry = state.bot_state.reconciliation_log[0]
@@ -118,12 +135,10 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should close with buy order (opposite of SHORT)
-        self.mock_client.close_position_market.assert_called_once_with(
-            'SOL/USDT', 'buy', 10.0, 'tp_breach'
-        )
+        self.assertEqual(self.client.close_calls, [('SOL/USDT', 'buy', 10.0, 'tp_breach')])
     
     def test_short_position_sl_breach(self):
         """Test closing SHORT position when SL is breached"""
@@ -139,12 +154,10 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should close with buy order
-        self.mock_client.close_position_market.assert_called_once_with(
-            'BNB/USDT', 'buy', 5.0, 'sl_breach'
-        )
+        self.assertEqual(self.client.close_calls, [('BNB/USDT', 'buy', 5.0, 'sl_breach')])
     
     def test_no_breach(self):
         """Test that position is NOT closed when no breach occurs"""
@@ -160,10 +173,49 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should not close position
-        self.mock_client.close_position_market.assert_not_called()
+        self.assertEqual(self.client.close_calls, [])
+    
+    def test_inconsistent_tp_sl_blocks_closure(self):
+        """Test that a breach is not acted on when TP/SL sit on the wrong side of entry"""
+        state.bot_state.positions = {
+            'BTC/USDT': {
+                'symbol': 'BTC/USDT',
+                'side': 'LONG',
+                'size': 0.01,
+                'entry_price': 40000.0,
+                'mark_price': 41500.0,  # Above TP
+                'take_profit': 39500.0,  # Below entry - invalid for LONG
+                'stop_loss': 39000.0
+            }
+        }
+        
+        monitor_and_close_positions(self.client)
+        
+        self.assertEqual(self.client.close_calls, [])
+        self.assertEqual(state.bot_state.reconciliation_log, [])
+    
+    def test_inconsistent_tp_sl_logged_without_breach(self):
+        """Test that wrong-side TP/SL is reported even while no level is breached"""
+        state.bot_state.positions = {
+            'BTC/USDT': {
+                'symbol': 'BTC/USDT',
+                'side': 'LONG',
+                'size': 0.01,
+                'entry_price': 40000.0,
+                'mark_price': 39800.0,  # Between SL and TP
+                'take_profit': 39900.0,  # Below entry - invalid for LONG
+                'stop_loss': 39000.0
+            }
+        }
+        
+        with patch('main.log_tp_sl_inconsistent') as mock_log:
+            monitor_and_close_positions(self.client)
+        
+        mock_log.assert_called_once()
+        self.assertEqual(self.client.close_calls, [])
     
     def test_position_without_tp_sl(self):
         """Test that position without TP/SL is skipped"""
@@ -179,10 +231,10 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should not close position
-        self.mock_client.close_position_market.assert_not_called()
+        self.assertEqual(self.client.close_calls, [])
     
     def test_cancel_existing_orders_before_close(self):
         """Test that existing TP/SL orders are cancelled before closing"""
@@ -199,20 +251,18 @@ class TestActiveMonitoring(unittest.TestCase):
         }
         
         # Mock existing orders
-        self.mock_client.get_tp_sl_orders_for_position.return_value = {
+        self.client.tp_sl_orders = {
             'sl_order': {'id': 'sl_123'},
             'tp_order': {'id': 'tp_456'}
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should cancel both orders
-        self.assertEqual(self.mock_client.cancel_order.call_count, 2)
-        self.mock_client.cancel_order.assert_any_call('BTC/USDT', 'sl_123')
-        self.mock_client.cancel_order.assert_any_call('BTC/USDT', 'tp_456')
+        self.assertEqual(self.client.cancel_calls, [('BTC/USDT', 'sl_123'), ('BTC/USDT', 'tp_456')])
         
         # Should still close position
-        self.mock_client.close_position_market.assert_called_once()
+        self.assertEqual(len(self.client.close_calls), 1)
     
     def test_pnl_calculation_long(self):
         """Test PnL calculation for LONG position"""
@@ -228,7 +278,7 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Check logged PnL
         log_entry = state.bot_state.reconciliation_log[0]
@@ -249,7 +299,7 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Check logged PnL
         log_entry = state.bot_state.reconciliation_log[0]
@@ -288,14 +338,13 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should close 2 positions (BTC TP breach, SOL SL breach)
-        self.assertEqual(self.mock_client.close_position_market.call_count, 2)
+        self.assertEqual(len(self.client.close_calls), 2)
         
         # Verify correct closures
-        calls = self.mock_client.close_position_market.call_args_list
-        call_symbols = [call[0][0] for call in calls]
+        call_symbols = [symbol for symbol, _, _, _ in self.client.close_calls]
         self.assertIn('BTC/USDT', call_symbols)
         self.assertIn('SOL/USDT', call_symbols)
     
@@ -323,15 +372,15 @@ class TestActiveMonitoring(unittest.TestCase):
         }
         
         # Make first close fail
-        self.mock_client.close_position_market.side_effect = [
+        self.client.close_results = [
             Exception("Network error"),
             {'id': '67890'}
         ]
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Should attempt to close both positions
-        self.assertEqual(self.mock_client.close_position_market.call_count, 2)
+        self.assertEqual(len(self.client.close_calls), 2)
     
     def test_forced_closure_log_structure(self):
         """Test that forced closure log has correct structure"""
@@ -347,7 +396,7 @@ class TestActiveMonitoring(unittest.TestCase):
             }
         }
         
-        monitor_and_close_positions(self.mock_client)
+        monitor_and_close_positions(self.client)
         
         # Check log entry structure
         log_entry = state.bot_state.reconciliation_log[0]
@@ -373,8 +422,6 @@ class TestClosePositionMarket(unittest.TestCase):
     
     def test_close_position_market_creates_reduce_only_order(self):
         """Test that close_position_market creates a reduceOnly market order"""
-        from execution import BinanceClient
-        
         client = BinanceClient()
         client.exchange = Mock()
         client.exchange.create_order = Mock(return_value={'id': '12345', 'status': 'closed'})
@@ -386,13 +433,10 @@ class TestClosePositionMarket(unittest.TestCase):
             'BTC/USDT', 'market', 'sell', 0.01, params={'reduceOnly': True}
         )
         
-        self.assertIsNotNone(result)
-        self.assertEqual(result['id'], '12345')
+        self.assertEqual(result, {'id': '12345', 'status': 'closed'})
     
     def test_close_position_market_handles_error(self):
         """Test that close_position_market handles errors gracefully"""
-        from execution import BinanceClient
-        
         client = BinanceClient()
         client.exchange = Mock()
         client.exchange.create_order = Mock(side_effect=Exception("API error"))
@@ -406,10 +450,6 @@ class TestClosePositionMarket(unittest.TestCase):
 class TestAddForcedClosureLog(unittest.TestCase):
     """Test add_forced_closure_log function"""
     
-    def setUp(self):
-        """Reset state before each test"""
-        state.bot_state.reconciliation_log = []
-    
     def test_add_forced_closure_log_creates_entry(self):
         """Test that add_forced_closure_log creates a log entry"""
         details = {
@@ -8,9 +8,6 @@ import json
 import tempfile
 import shutil
 
-# Add parent directory to path to import modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 import state
 
 def test_balance_history_persistence():
@@ -1,23 +1,20 @@
-import unittest
+import pytest
 
 from risk_manager import compute_tp_sl
 
 
-class ComputeTpSlTests(unittest.TestCase):
-    def test_long_tp_sl(self):
-        tp, sl = compute_tp_sl(100.0, 0.02, 0.01, 'long')
-        self.assertAlmostEqual(tp, 102.0)
-        self.assertAlmostEqual(sl, 99.0)
+def test_long_tp_sl():
+    tp, sl = compute_tp_sl(100.0, 0.02, 0.01, 'long')
+    assert tp == pytest.approx(102.0)
+    assert sl == pytest.approx(99.0)
 
-    def test_short_tp_sl(self):
-        tp, sl = compute_tp_sl(100.0, 0.02, 0.01, 'short')
-        self.assertAlmostEqual(tp, 98.0)
-        self.assertAlmostEqual(sl, 101.0)
 
-    def test_invalid_side(self):
-        with self.assertRaises(ValueError):
-            compute_tp_sl(100.0, 0.02, 0.01, 'invalid')
+def test_short_tp_sl():
+    tp, sl = compute_tp_sl(100.0, 0.02, 0.01, 'short')
+    assert tp == pytest.approx(98.0)
+    assert sl == pytest.approx(101.0)
 
 
-if __name__ == '__main__':
-    unittest.main()
+def test_invalid_side():
+    with pytest.raises(ValueError):
+        compute_tp_sl(100.0, 0.02, 0.01, 'invalid')
@@ -1,126 +1,116 @@
 """
 Integration tests for TP/SL execution flow with mocked ccxt exchange
 """
-import unittest
-from unittest.mock import Mock, MagicMock, patch, call
-import sys
-import os
+from unittest.mock import MagicMock, patch
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
 
 from execution import BinanceClient
-import state
 
 
-class TestTPSLExecutionFlow(unittest.TestCase):
+# create_order responses (SL first, then TP); read-only, shared across tests
+_PLACED_SL_TP = (
+    {'id': 'sl_order_123', 'type': 'STOP_MARKET', 'status': 'open'},
+    {'id': 'tp_order_456', 'type': 'TAKE_PROFIT_MARKET', 'status': 'open'},
+)
+_REPLACED_SL_TP = (
+    {'id': 'new_sl_order', 'type': 'STOP_MARKET'},
+    {'id': 'new_tp_order', 'type': 'TAKE_PROFIT_MARKET'},
+)
+
+
+class _ExchangeStub:
+    """Minimal exchange: queued create_order responses, fixed open orders, call records."""
+
+    markets = {'BTC/USDT': {'symbol': 'BTC/USDT'}, 'ETH/USDT': {'symbol': 'ETH/USDT'}}
+
+    def __init__(self, *responses, open_orders=()):
+        self._responses = list(responses)
+        self.open_orders = list(open_orders)
+        self.create_calls = []
+        self.cancel_calls = []
+
+    def fetch_open_orders(self, symbol=None):
+        return self.open_orders
+
+    def create_order(self, *args, **kwargs):
+        self.create_calls.append((args, kwargs))
+        return self._responses.pop(0)
+
+    def cancel_order(self, order_id, symbol):
+        self.cancel_calls.append((order_id, symbol))
+        return {'status': 'canceled'}
+
+
+@pytest.fixture(scope="module")
+def mock_binance_class():
+    """Patch ccxt.binance once for the whole module."""
+    patcher = patch('execution.ccxt.binance')
+    mock_cls = patcher.start()
+    mock_cls.return_value = MagicMock()
+    yield mock_cls
+    patcher.stop()
+
+
+@pytest.fixture(scope="class")
+def patched_client(request, mock_binance_class):
+    """Build one BinanceClient on the mocked exchange for the whole class."""
+    request.cls.ex = mock_binance_class.return_value
+    request.cls.client = BinanceClient()
+
+
+@pytest.mark.usefixtures("patched_client")
+class TestTPSLExecutionFlow:
     """Test TP/SL order placement flow with mocked exchange"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        # Reset bot state before each test
-        state.bot_state.positions = {}
-        state.bot_state.exchange_open_orders = []
-        state.bot_state.pending_orders = {}
-        state.bot_state.reconciliation_log = []
-    
-    @patch('execution.ccxt.binance')
-    def test_place_sl_tp_orders_for_long_position(self, mock_binance_class):
-        """Test placing TP/SL orders for a LONG position"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
-        
-        # Mock create_order to return order objects
-        mock_exchange.create_order.side_effect = [
-            {'id': 'sl_order_123', 'type': 'STOP_MARKET', 'status': 'open'},
-            {'id': 'tp_order_456', 'type': 'TAKE_PROFIT_MARKET', 'status': 'open'}
-        ]
-        
-        # Create client
-        client = BinanceClient()
-        
-        # Place TP/SL orders for a LONG position
-        result = client.place_sl_tp_orders(
-            symbol='BTC/USDT',
-            side='buy',  # Entry side (LONG)
-            amount=0.1,
-            sl_price=43000.0,
-            tp_price=49000.0
-        )
-        
-        # Verify both orders were created
-        self.assertIsNotNone(result['sl_order'])
-        self.assertIsNotNone(result['tp_order'])
-        self.assertEqual(result['sl_order']['id'], 'sl_order_123')
-        self.assertEqual(result['tp_order']['id'], 'tp_order_456')
-        
-        # Verify create_order was called twice with correct parameters
-        self.assertEqual(mock_exchange.create_order.call_count, 2)
-        
-        # Check SL order call (close side is 'sell' for LONG)
-        sl_call = mock_exchange.create_order.call_args_list[0]
-        self.assertEqual(sl_call[0][0], 'BTC/USDT')
-        self.assertEqual(sl_call[0][1], 'STOP_MARKET')
-        self.assertEqual(sl_call[0][2], 'sell')
-        self.assertEqual(sl_call[0][3], 0.1)
-        self.assertEqual(sl_call[1]['params']['stopPrice'], 43000.0)
-        self.assertTrue(sl_call[1]['params']['reduceOnly'])
-        
-        # Check TP order call
-        tp_call = mock_exchange.create_order.call_args_list[1]
-        self.assertEqual(tp_call[0][0], 'BTC/USDT')
-        self.assertEqual(tp_call[0][1], 'TAKE_PROFIT_MARKET')
-        self.assertEqual(tp_call[0][2], 'sell')
-        self.assertEqual(tp_call[0][3], 0.1)
-        self.assertEqual(tp_call[1]['params']['stopPrice'], 49000.0)
-        self.assertTrue(tp_call[1]['params']['reduceOnly'])
+    @pytest.fixture(autouse=True)
+    def _reset(self):
+        """Reset the exchange mock (and undo any stub swap) before each test"""
+        self.ex.reset_mock(return_value=True, side_effect=True)
+        self.client.exchange = self.ex
+        self.client._invalidate_open_orders_snapshot()
+
+    def _use_stub(self, *responses, open_orders=()):
+        """Swap the client's exchange for an _ExchangeStub."""
+        stub = _ExchangeStub(*responses, open_orders=open_orders)
+        self.client.exchange = stub
+        return stub
     
-    @patch('execution.ccxt.binance')
-    def test_place_sl_tp_orders_for_short_position(self, mock_binance_class):
-        """Test placing TP/SL orders for a SHORT position"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
-        
-        # Mock create_order to return order objects
-        mock_exchange.create_order.side_effect = [
-            {'id': 'sl_order_789', 'type': 'STOP_MARKET', 'status': 'open'},
-            {'id': 'tp_order_012', 'type': 'TAKE_PROFIT_MARKET', 'status': 'open'}
-        ]
-        
-        # Create client
-        client = BinanceClient()
+    @pytest.mark.parametrize("symbol, entry_side, close_side, amount, sl_price, tp_price", [
+        ('BTC/USDT', 'buy', 'sell', 0.1, 43000.0, 49000.0),   # LONG closes with sell
+        ('ETH/USDT', 'sell', 'buy', 2.0, 3100.0, 2800.0),     # SHORT closes with buy
+    ], ids=["long", "short"])
+    def test_place_sl_tp_orders(self, symbol, entry_side, close_side, amount, sl_price, tp_price):
+        """Test placing TP/SL orders for LONG and SHORT positions"""
+        ex = self._use_stub(*_PLACED_SL_TP)
         
-        # Place TP/SL orders for a SHORT position
-        result = client.place_sl_tp_orders(
-            symbol='ETH/USDT',
-            side='sell',  # Entry side (SHORT)
-            amount=2.0,
-            sl_price=3100.0,
-            tp_price=2800.0
+        result = self.client.place_sl_tp_orders(
+            symbol=symbol,
+            side=entry_side,
+            amount=amount,
+            sl_price=sl_price,
+            tp_price=tp_price
         )
         
         # Verify both orders were created
-        self.assertIsNotNone(result['sl_order'])
-        self.assertIsNotNone(result['tp_order'])
+        assert result['sl_order']['id'] == 'sl_order_123'
+        assert result['tp_order']['id'] == 'tp_order_456'
         
-        # Verify create_order was called with 'buy' side (close side for SHORT)
-        sl_call = mock_exchange.create_order.call_args_list[0]
-        self.assertEqual(sl_call[0][2], 'buy')  # Close side
-        
-        tp_call = mock_exchange.create_order.call_args_list[1]
-        self.assertEqual(tp_call[0][2], 'buy')  # Close side
+        # Verify create_order was called twice: SL first, then TP, both on the close side
+        assert len(ex.create_calls) == 2
+        for (args, kwargs), order_type, stop_price in zip(
+            ex.create_calls,
+            ('STOP_MARKET', 'TAKE_PROFIT_MARKET'),
+            (sl_price, tp_price),
+        ):
+            assert args == (symbol, order_type, close_side, amount)
+            assert kwargs['params']['stopPrice'] == stop_price
+            assert kwargs['params']['reduceOnly']
     
-    @patch('execution.ccxt.binance')
-    def test_get_tp_sl_orders_for_position(self, mock_binance_class):
+    def test_get_tp_sl_orders_for_position(self):
         """Test retrieving TP/SL orders for a position"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
-        
-        # Mock fetch_open_orders to return TP/SL orders
-        mock_exchange.fetch_open_orders.return_value = [
+        # Stub exchange returning a limit order plus TP/SL orders
+        self._use_stub(open_orders=[
             {
                 'id': 'limit_order_1',
                 'symbol': 'BTC/USDT',
@@ -143,31 +133,23 @@ class TestTPSLExecutionFlow(unittest.TestCase):
                 'stopPrice': 49000.0,
                 'amount': 0.1
             }
-        ]
-        
-        # Create client
-        client = BinanceClient()
+        ])
         
         # Get TP/SL orders
-        result = client.get_tp_sl_orders_for_position('BTC/USDT')
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT')
         
         # Verify correct orders were identified
-        self.assertIsNotNone(result['sl_order'])
-        self.assertIsNotNone(result['tp_order'])
-        self.assertEqual(result['sl_order']['id'], 'sl_order_1')
-        self.assertEqual(result['tp_order']['id'], 'tp_order_1')
-        self.assertEqual(result['sl_order']['stopPrice'], 43000.0)
-        self.assertEqual(result['tp_order']['stopPrice'], 49000.0)
+        assert result['sl_order'] is not None
+        assert result['tp_order'] is not None
+        assert result['sl_order']['id'] == 'sl_order_1'
+        assert result['tp_order']['id'] == 'tp_order_1'
+        assert result['sl_order']['stopPrice'] == 43000.0
+        assert result['tp_order']['stopPrice'] == 49000.0
     
-    @patch('execution.ccxt.binance')
-    def test_get_tp_sl_orders_missing_sl(self, mock_binance_class):
+    def test_get_tp_sl_orders_missing_sl(self):
         """Test retrieving TP/SL when SL is missing"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
-        
-        # Mock fetch_open_orders to return only TP order
-        mock_exchange.fetch_open_orders.return_value = [
+        # Stub exchange returning only a TP order
+        self._use_stub(open_orders=[
             {
                 'id': 'tp_order_1',
                 'symbol': 'BTC/USDT',
@@ -175,28 +157,20 @@ class TestTPSLExecutionFlow(unittest.TestCase):
                 'reduceOnly': True,
                 'stopPrice': 49000.0
             }
-        ]
-        
-        # Create client
-        client = BinanceClient()
+        ])
         
         # Get TP/SL orders
-        result = client.get_tp_sl_orders_for_position('BTC/USDT')
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT')
         
         # Verify SL is None and TP is present
-        self.assertIsNone(result['sl_order'])
-        self.assertIsNotNone(result['tp_order'])
-        self.assertEqual(result['tp_order']['id'], 'tp_order_1')
+        assert result['sl_order'] is None
+        assert result['tp_order'] is not None
+        assert result['tp_order']['id'] == 'tp_order_1'
     
-    @patch('execution.ccxt.binance')
-    def test_get_tp_sl_orders_missing_tp(self, mock_binance_class):
+    def test_get_tp_sl_orders_missing_tp(self):
         """Test retrieving TP/SL when TP is missing"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
-        
-        # Mock fetch_open_orders to return only SL order
-        mock_exchange.fetch_open_orders.return_value = [
+        # Stub exchange returning only an SL order
+        self._use_stub(open_orders=[
             {
                 'id': 'sl_order_1',
                 'symbol': 'BTC/USDT',
@@ -204,44 +178,136 @@ class TestTPSLExecutionFlow(unittest.TestCase):
                 'reduceOnly': True,
                 'stopPrice': 43000.0
             }
-        ]
-        
-        # Create client
-        client = BinanceClient()
+        ])
         
         # Get TP/SL orders
-        result = client.get_tp_sl_orders_for_position('BTC/USDT')
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT')
         
         # Verify TP is None and SL is present
-        self.assertIsNotNone(result['sl_order'])
-        self.assertIsNone(result['tp_order'])
-        self.assertEqual(result['sl_order']['id'], 'sl_order_1')
+        assert result['sl_order'] is not None
+        assert result['tp_order'] is None
+        assert result['sl_order']['id'] == 'sl_order_1'
     
-    @patch('execution.ccxt.binance')
-    def test_cancel_and_replace_tp_sl_on_quantity_mismatch(self, mock_binance_class):
-        """Test cancelling and replacing TP/SL when quantities don't match"""
-        # Set up mock exchange
-        mock_exchange = MagicMock()
-        mock_binance_class.return_value = mock_exchange
+    def test_get_tp_sl_orders_reuses_fresh_open_orders_snapshot(self):
+        """Test that allow_cached reuses a fresh get_all_open_orders snapshot"""
+        self.ex.fetch_open_orders.return_value = [
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
+            {'id': 'tp_order_1', 'symbol': 'BTC/USDT', 'type': 'TAKE_PROFIT_MARKET', 'reduceOnly': True},
+        ]
+        self.client.get_all_open_orders()
+        self.ex.fetch_open_orders.reset_mock()
+        
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT', allow_cached=True)
+        
+        self.ex.fetch_open_orders.assert_not_called()
+        assert result['sl_order']['id'] == 'sl_order_1'
+        assert result['tp_order']['id'] == 'tp_order_1'
+    
+    def test_get_tp_sl_orders_refetches_by_default(self):
+        """Test that the protective-order check never trusts the snapshot"""
+        self.ex.fetch_open_orders.return_value = [
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
+        ]
+        self.client.get_all_open_orders()
+        # The stop fills after the snapshot was taken
+        self.ex.fetch_open_orders.return_value = []
+        
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT')
+        
+        self.ex.fetch_open_orders.assert_called_with('BTC/USDT')
+        assert result['sl_order'] is None
+    
+    def test_get_tp_sl_orders_without_snapshot_attributes(self):
+        """Test that a client built without __init__ fetches instead of failing"""
+        client = BinanceClient.__new__(BinanceClient)
+        client.exchange = _ExchangeStub(open_orders=[
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
+        ])
+        
+        result = client.get_tp_sl_orders_for_position('BTC/USDT', allow_cached=True)
+        
+        assert result['sl_order']['id'] == 'sl_order_1'
+    
+    def test_get_tp_sl_orders_skips_malformed_orders(self):
+        """Test that a malformed open order is skipped and the others still classified"""
+        self._use_stub(open_orders=[
+            None,
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
+        ])
+        
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT')
+        
+        assert result['sl_order']['id'] == 'sl_order_1'
+        assert result['tp_order'] is None
+    
+    def test_malformed_order_does_not_stop_position_trade_reconciliation(self, monkeypatch):
+        """Test that every existing position still gets a trade entry despite a malformed order"""
+        # Imported here so the client-only tests do not load main
+        import main
+        import state
+        
+        self._use_stub(open_orders=[
+            None,
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'stopPrice': 43000.0},
+        ])
+        monkeypatch.setattr(self.client, 'get_all_positions', lambda: [
+            {'symbol': 'BTC/USDT', 'side': 'long', 'contracts': 0.1, 'entryPrice': 45000.0},
+            {'symbol': 'ETH/USDT', 'side': 'short', 'contracts': 2.0, 'entryPrice': 3000.0},
+        ])
         
-        # Mock cancel_order
-        mock_exchange.cancel_order.return_value = {'status': 'canceled'}
+        main.reconcile_existing_positions_with_trades(self.client)
         
-        # Mock create_order for new orders
-        mock_exchange.create_order.side_effect = [
-            {'id': 'new_sl_order', 'type': 'STOP_MARKET'},
-            {'id': 'new_tp_order', 'type': 'TAKE_PROFIT_MARKET'}
+        trades = {t['symbol']: t for t in state.bot_state.trade_history}
+        assert set(trades) == {'BTC/USDT', 'ETH/USDT'}
+        assert trades['BTC/USDT']['stop_loss'] == 43000.0
+    
+    def test_cancel_invalidates_open_orders_snapshot(self):
+        """Test that cancelling an order forces the next TP/SL lookup to refetch"""
+        self.ex.fetch_open_orders.return_value = [
+            {'id': 'sl_order_1', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
         ]
+        self.client.get_all_open_orders()
+        self.client.cancel_order('BTC/USDT', 'sl_order_1')
+        self.ex.fetch_open_orders.return_value = []
+        
+        result = self.client.get_tp_sl_orders_for_position('BTC/USDT', allow_cached=True)
         
-        # Create client
-        client = BinanceClient()
+        self.ex.fetch_open_orders.assert_called_with('BTC/USDT')
+        assert result['sl_order'] is None
+    
+    def test_get_open_orders_by_symbol_feeds_tp_sl_lookup(self):
+        """Test that one bulk fetch can answer TP/SL lookups for every symbol"""
+        self.ex.fetch_open_orders.return_value = [
+            {'id': 'btc_sl', 'symbol': 'BTC/USDT:USDT', 'type': 'STOP_MARKET', 'reduceOnly': True},
+            {'id': 'eth_tp', 'symbol': 'ETH/USDT', 'type': 'TAKE_PROFIT_MARKET', 'reduceOnly': True},
+        ]
+        
+        by_symbol = self.client.get_open_orders_by_symbol()
+        self.ex.fetch_open_orders.reset_mock()
+        result = self.client.get_tp_sl_orders_for_position('ETH/USDT', orders=by_symbol['ETH/USDT'])
+        
+        assert sorted(by_symbol) == ['BTC/USDT', 'ETH/USDT']
+        self.ex.fetch_open_orders.assert_not_called()
+        assert result['tp_order']['id'] == 'eth_tp'
+        assert result['sl_order'] is None
+    
+    def test_get_open_orders_by_symbol_returns_none_on_fetch_error(self):
+        """Test that a failed bulk fetch is reported as None, not as 'no orders'"""
+        self.ex.fetch_open_orders.side_effect = Exception("Network error")
+        
+        assert self.client.get_open_orders_by_symbol() is None
+    
+    def test_cancel_and_replace_tp_sl_on_quantity_mismatch(self):
+        """Test cancelling and replacing TP/SL when quantities don't match"""
+        # Stub create_order responses for the replacement orders
+        ex = self._use_stub(*_REPLACED_SL_TP)
         
         # Cancel old order
-        cancel_result = client.cancel_order('BTC/USDT', 'old_sl_order')
-        self.assertTrue(cancel_result)
+        cancel_result = self.client.cancel_order('BTC/USDT', 'old_sl_order')
+        assert cancel_result
         
         # Place new TP/SL orders
-        new_orders = client.place_sl_tp_orders(
+        new_orders = self.client.place_sl_tp_orders(
             symbol='BTC/USDT',
             side='buy',
             amount=0.2,  # New quantity
@@ -250,11 +316,7 @@ class TestTPSLExecutionFlow(unittest.TestCase):
         )
         
         # Verify old order was cancelled and new orders were placed
-        mock_exchange.cancel_order.assert_called_once_with('old_sl_order', 'BTC/USDT')
-        self.assertEqual(mock_exchange.create_order.call_count, 2)
-        self.assertEqual(new_orders['sl_order']['id'], 'new_sl_order')
-        self.assertEqual(new_orders['tp_order']['id'], 'new_tp_order')
-
-
-if __name__ == '__main__':
-    unittest.main()
+        assert ex.cancel_calls == [('old_sl_order', 'BTC/USDT')]
+        assert len(ex.create_calls) == 2
+        assert new_orders['sl_order']['id'] == 'new_sl_order'
+        assert new_orders['tp_order']['id'] == 'new_tp_order'
@@ -1,28 +1,12 @@
 """
 Test for automatic re-placement of manually cancelled orders
 """
-import unittest
-from unittest.mock import Mock, MagicMock, patch
-import sys
-import os
-
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import state
 
 
-class TestManualOrderCancellation(unittest.TestCase):
+class TestManualOrderCancellation:
     """Test that manually cancelled orders can be automatically replaced"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        # Reset bot state before each test
-        state.bot_state.positions = {}
-        state.bot_state.exchange_open_orders = []
-        state.bot_state.pending_orders = {}
-        state.bot_state.reconciliation_log = []
-    
     def test_pending_order_verification_allows_replacement_when_cancelled(self):
         """Test that pending order check allows new placement if order was cancelled"""
         # This simulates the scenario where:
@@ -42,9 +26,7 @@ class TestManualOrderCancellation(unittest.TestCase):
         })
         
         # Verify it was added
-        pending = state.get_pending_order(symbol)
-        self.assertIsNotNone(pending)
-        self.assertEqual(pending['order_id'], 'order_123')
+        assert state.get_pending_order(symbol)['order_id'] == 'order_123'
     
     def test_remove_pending_order_allows_new_placement(self):
         """Test that removing a pending order allows new placement"""
@@ -60,14 +42,26 @@ class TestManualOrderCancellation(unittest.TestCase):
         })
         
         # Verify it exists
-        self.assertIsNotNone(state.get_pending_order(symbol))
+        assert state.get_pending_order(symbol) is not None
         
         # Remove it (simulating detection of cancelled order)
         state.remove_pending_order(symbol)
         
         # Verify it's removed
-        self.assertIsNone(state.get_pending_order(symbol))
+        assert state.get_pending_order(symbol) is None
 
+    def test_pending_order_numeric_params_normalized_to_float(self):
+        """Test that pending order prices/quantity are stored as floats"""
+        state.add_pending_order('SOL/USDT', 'order_789', {
+            'side': 'buy',
+            'quantity': '3',
+            'entry_price': '120.5',
+            'stop_loss': 118,
+            'take_profit': 125.0
+        })
 
-if __name__ == '__main__':
-    unittest.main()
+        params = state.get_pending_order('SOL/USDT')['params']
+        assert params['quantity'] == 3.0
+        assert params['entry_price'] == 120.5
+        assert type(params['stop_loss']) is float
+        assert params['side'] == 'buy'
@@ -2,13 +2,11 @@
 Test metrics persistence functionality.
 """
 import unittest
-import sys
 import os
+import shutil
 import tempfile
 import json
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from unittest.mock import patch
 
 import state
 
@@ -20,21 +18,13 @@ class TestMetricsPersistence(unittest.TestCase):
         # Use temporary files for testing
         self.temp_dir = tempfile.mkdtemp()
         state.METRICS_FILE = os.path.join(self.temp_dir, 'metrics.json')
-        state.TRADE_HISTORY_FILE = os.path.join(self.temp_dir, 'trade_history.json')
-        
-        # Reset state
-        state.bot_state.metrics.pending_orders_count = 0
-        state.bot_state.metrics.open_exchange_orders_count = 0
-        state.bot_state.metrics.placed_orders_count = 0
-        state.bot_state.metrics.cancelled_orders_count = 0
-        state.bot_state.metrics.filled_orders_count = 0
-        state.bot_state.trade_history = []
-        state.bot_state.total_pnl = 0.0
+        state.TRADE_HISTORY_FILE = os.path.join(self.temp_dir, 'trade_history.jsonl')
+        state.LEGACY_TRADE_HISTORY_FILE = os.path.join(self.temp_dir, 'trade_history.json')
     
     def tearDown(self):
         """Clean up test fixtures."""
-        # Remove temporary files
-        import shutil
+        # Finish queued writes, then remove temporary files
+        state.flush_writes()
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
     
@@ -47,6 +37,7 @@ class TestMetricsPersistence(unittest.TestCase):
         
         # Save metrics
         state.save_metrics()
+        state.flush_writes()
         
         # Verify file was created
         self.assertTrue(os.path.exists(state.METRICS_FILE))
@@ -91,7 +82,7 @@ class TestMetricsPersistence(unittest.TestCase):
         state.add_trade(trade1)
         state.add_trade(trade2)
         
-        # Verify file was created (add_trade calls save_trade_history)
+        # Verify file was created (add_trade appends to the trade history file)
         self.assertTrue(os.path.exists(state.TRADE_HISTORY_FILE))
         
         # Reset trade history
@@ -125,6 +116,90 @@ class TestMetricsPersistence(unittest.TestCase):
         # Verify total P&L (100 - 50 + 75 = 125)
         self.assertEqual(state.bot_state.total_pnl, 125.0)
     
+    def test_closed_trade_supersedes_open_record(self):
+        """Test that the appended CLOSED record replaces the OPEN one on load."""
+        state.add_trade({'symbol': 'BTC/USDT', 'side': 'LONG', 'entry_price': 100.0,
+                         'size': 1.0, 'status': 'OPEN', 'pnl': None})
+        state._close_trade_in_history('BTC/USDT', {'mark_price': 110.0, 'entry_price': 100.0})
+
+        with open(state.TRADE_HISTORY_FILE) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        state.bot_state.trade_history = []
+        state.bot_state.total_pnl = 0.0
+        state.load_trade_history_on_startup()
+
+        self.assertEqual(len(state.bot_state.trade_history), 1)
+        self.assertEqual(state.bot_state.trade_history[0]['status'], 'CLOSED')
+        self.assertEqual(state.bot_state.total_pnl, 10.0)
+        # Load compacts the superseded record away
+        with open(state.TRADE_HISTORY_FILE) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_legacy_json_array_trade_history_is_migrated(self):
+        """Test that a trade history saved as a JSON array is migrated to JSON lines once."""
+        legacy = [
+            {'symbol': 'ETH/USDT', 'pnl': 50, 'status': 'CLOSED', 'timestamp': '2024-01-02T00:00:00'},
+            {'symbol': 'BTC/USDT', 'pnl': 25, 'status': 'CLOSED', 'timestamp': '2024-01-01T00:00:00'},
+        ]
+        with open(state.LEGACY_TRADE_HISTORY_FILE, 'w') as f:
+            json.dump(legacy, f, indent=2)
+
+        state.load_trade_history_on_startup()
+
+        self.assertEqual([t['symbol'] for t in state.bot_state.trade_history], ['ETH/USDT', 'BTC/USDT'])
+        self.assertEqual(state.bot_state.total_pnl, 75.0)
+        self.assertFalse(os.path.exists(state.LEGACY_TRADE_HISTORY_FILE))
+        self.assertTrue(os.path.exists(state.LEGACY_TRADE_HISTORY_FILE + '.migrated'))
+        with open(state.TRADE_HISTORY_FILE) as f:
+            self.assertEqual([json.loads(line)['symbol'] for line in f], ['BTC/USDT', 'ETH/USDT'])
+
+    def test_truncated_last_line_is_skipped(self):
+        """Test that a partial last line keeps earlier trades and is compacted away."""
+        with open(state.TRADE_HISTORY_FILE, 'w') as f:
+            f.write(json.dumps({'symbol': 'BTC/USDT', 'pnl': 40, 'status': 'CLOSED',
+                                'timestamp': '2024-01-01T00:00:00'}) + '\n')
+            f.write(json.dumps({'symbol': 'ETH/USDT', 'pnl': 10, 'status': 'CLOSED',
+                                'timestamp': '2024-01-02T00:00:00'}) + '\n')
+            f.write('{"symbol": "SOL/USDT", "pnl": 5, "sta')
+
+        state.load_trade_history_on_startup()
+
+        self.assertEqual([t['symbol'] for t in state.bot_state.trade_history], ['ETH/USDT', 'BTC/USDT'])
+        self.assertEqual(state.bot_state.total_pnl, 50.0)
+        with open(state.TRADE_HISTORY_FILE) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.endswith('\n') for line in lines))
+
+    def test_truncated_last_line_with_invalid_utf8_is_skipped(self):
+        """Test that a last line cut mid-character is skipped on the stdlib json path."""
+        with open(state.TRADE_HISTORY_FILE, 'wb') as f:
+            f.write(json.dumps({'symbol': 'BTC/USDT', 'pnl': 40, 'status': 'CLOSED',
+                                'timestamp': '2024-01-01T00:00:00'}).encode() + b'\n')
+            f.write('{"symbol": "BTC/USDT", "note": "\u20ac'.encode()[:-1])
+
+        with patch.object(state, 'orjson', None):
+            state.load_trade_history_on_startup()
+
+        self.assertEqual([t['symbol'] for t in state.bot_state.trade_history], ['BTC/USDT'])
+        self.assertEqual(state.bot_state.total_pnl, 40.0)
+
+    def test_write_batch_coalesces_per_file(self):
+        """Test that only the latest queued snapshot is written for each file."""
+        path = os.path.join(self.temp_dir, 'batch.json')
+        other = os.path.join(self.temp_dir, 'other.json')
+        state._write_batch([
+            (path, b'first'),
+            (other, b'other'),
+            (path, b'latest'),
+        ])
+
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'latest')
+        with open(other, 'rb') as f:
+            self.assertEqual(f.read(), b'other')
+
     def test_load_metrics_with_missing_file(self):
         """Test that loading metrics with missing file doesn't crash."""
         # Ensure file doesn't exist
@@ -1,20 +1,16 @@
-import unittest
-from unittest.mock import MagicMock
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
 
 import order_utils
 import state
 
 TEST_SYMBOL = "BTC/USDT"
+_MARKETS = {TEST_SYMBOL: {"info": {"filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.1"}]}}}
 
 
 class DummyExchange:
     def __init__(self, price):
         self.price = price
-        self.markets = {TEST_SYMBOL: {"info": {"filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.1"}]}}}
+        self.markets = _MARKETS
 
     def fetch_ticker(self, symbol):
         return {"last": self.price}
@@ -46,39 +42,46 @@ class DummyClient:
         return {"id": "close"}
 
 
-class TestOrderUtils(unittest.TestCase):
-    def setUp(self):
-        state.bot_state.tp_sl_backoff = {}
-
-    def test_round_to_tick(self):
-        self.assertEqual(order_utils.round_to_tick(123.456, 0.1), 123.5)
-        self.assertEqual(order_utils.round_to_tick(0.00012345, 0.00001), 0.00012)
-
-    def test_safe_place_tp_sl_places_conditionals(self):
-        client = DummyClient(price=100)
-        ok = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
-        self.assertTrue(ok)
-        self.assertEqual(client.stop_calls, 1)
-        self.assertEqual(client.tp_calls, 1)
-        self.assertEqual(client.close_calls, 0)
-
-    def test_safe_place_tp_sl_market_fallback_when_crossed(self):
-        client = DummyClient(price=120)  # TP already crossed for long
-        ok = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
-        self.assertTrue(ok)
-        self.assertEqual(client.close_calls, 1)
-        self.assertEqual(client.stop_calls, 0)
-        self.assertEqual(client.tp_calls, 0)
-
-    def test_backoff_skips_repeat_attempt(self):
-        client = DummyClient(price=120)
-        first = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
-        self.assertTrue(first)
-        # second call should skip due to backoff
-        second = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
-        self.assertFalse(second)
-        self.assertEqual(client.close_calls, 1)
-
-
-if __name__ == "__main__":
-    unittest.main()
+def test_round_to_tick():
+    assert order_utils.round_to_tick(123.456, 0.1) == 123.5
+    assert order_utils.round_to_tick(0.00012345, 0.00001) == 0.00012
+
+
+def test_safe_place_tp_sl_places_conditionals():
+    client = DummyClient(price=100)
+    ok = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
+    assert ok
+    assert client.stop_calls == 1
+    assert client.tp_calls == 1
+    assert client.close_calls == 0
+
+
+def test_safe_place_tp_sl_market_fallback_when_crossed():
+    client = DummyClient(price=120)  # TP already crossed for long
+    ok = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
+    assert ok
+    assert client.close_calls == 1
+    assert client.stop_calls == 0
+    assert client.tp_calls == 0
+
+
+def test_backoff_skips_repeat_attempt():
+    client = DummyClient(price=120)
+    first = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
+    assert first
+    # second call should skip due to backoff
+    second = order_utils.safe_place_tp_sl(client, TEST_SYMBOL, True, 1, 110, 90)
+    assert not second
+    assert client.close_calls == 1
+    assert state.bot_state.tp_sl_backoff[TEST_SYMBOL]["logged"]
+
+
+def test_backoff_expires_on_monotonic_deadline():
+    order_utils.set_backoff(TEST_SYMBOL, seconds=30)
+    in_backoff, remaining = order_utils.check_backoff(TEST_SYMBOL)
+    assert in_backoff
+    assert 0 < remaining <= 30
+
+    state.bot_state.tp_sl_backoff[TEST_SYMBOL]["until"] = time.monotonic() - 1
+    assert order_utils.check_backoff(TEST_SYMBOL) == (False, 0)
+    assert TEST_SYMBOL not in state.bot_state.tp_sl_backoff
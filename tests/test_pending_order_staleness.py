@@ -0,0 +1,131 @@
+"""
+Tests for stale pending-order handling in the bot loop
+"""
+import pytest
+
+import config
+import main
+import state
+
+
+class _StopLoop(BaseException):
+    """Raised from the patched end-of-cycle sleep to leave run_bot_logic."""
+
+
+class _LoopClient:
+    """BinanceClient stand-in covering one bot-loop cycle with no positions."""
+
+    def __init__(self, on_status=None):
+        self.on_status = on_status  # called with the symbol on each status poll
+        self.cancel_calls = []
+
+    def get_all_open_orders(self):
+        return []
+
+    def get_all_positions(self):
+        return []
+
+    def get_order_status(self, symbol, order_id):
+        if self.on_status:
+            self.on_status(symbol)
+        return {'status': 'open', 'amount': 1.0, 'filled': 0.0}
+
+    def cancel_order(self, symbol, order_id):
+        self.cancel_calls.append((symbol, order_id))
+        return True
+
+    def get_full_balance(self):
+        return {'total': 1000.0, 'free': 1000.0, 'used': 0.0}
+
+
+def _run_cycles(monkeypatch, client, cycles=1, between_cycles=None):
+    """Run run_bot_logic for the given number of cycles against client."""
+    monkeypatch.setattr(state, "init", lambda: None)
+    monkeypatch.setattr(main, "BinanceClient", lambda: client)
+    for name in ("reconcile_live_orders", "reconcile_all_positions_tp_sl",
+                 "reconcile_existing_positions_with_trades"):
+        monkeypatch.setattr(main, name, lambda client: None)
+    monkeypatch.setattr(main.utils, "get_trading_pairs", lambda: ())
+    remaining = [cycles]
+
+    def fake_sleep(seconds):
+        remaining[0] -= 1
+        if remaining[0] <= 0:
+            raise _StopLoop()
+        if between_cycles:
+            between_cycles()
+
+    monkeypatch.setattr(main.time, "sleep", fake_sleep)
+    with pytest.raises(_StopLoop):
+        main.run_bot_logic()
+
+
+@pytest.fixture
+def stale_seconds():
+    """The configured staleness threshold, read once per test."""
+    return config.PENDING_ORDER_STALE_SECONDS
+
+
+def _add_pending(symbol, order_id):
+    state.add_pending_order(symbol, order_id, {'side': 'buy', 'entry_price': 100.0,
+                                               'stop_loss': 95.0, 'take_profit': 110.0,
+                                               'quantity': 1.0})
+
+
+def test_stale_pending_order_is_cancelled(monkeypatch, frozen_datetime, stale_seconds):
+    """Test a pending order older than PENDING_ORDER_STALE_SECONDS is cancelled"""
+    _add_pending('BTC/USDT', 'old-order')
+    frozen_datetime.advance(stale_seconds + 1)
+    client = _LoopClient()
+
+    _run_cycles(monkeypatch, client)
+
+    assert client.cancel_calls == [('BTC/USDT', 'old-order')]
+    assert state.get_pending_order('BTC/USDT') is None
+
+
+def test_recent_pending_order_is_kept(monkeypatch, frozen_datetime, stale_seconds):
+    """Test a pending order inside the staleness window is left alone"""
+    _add_pending('BTC/USDT', 'new-order')
+    frozen_datetime.advance(stale_seconds - 1)
+    client = _LoopClient()
+
+    _run_cycles(monkeypatch, client)
+
+    assert client.cancel_calls == []
+    assert state.get_pending_order('BTC/USDT')['order_id'] == 'new-order'
+
+
+def test_staleness_uses_time_of_each_check(monkeypatch, frozen_datetime, stale_seconds):
+    """Test time spent polling earlier orders counts toward later orders' age"""
+    _add_pending('BTC/USDT', 'btc-order')
+    _add_pending('ETH/USDT', 'eth-order')
+    frozen_datetime.advance(stale_seconds - 1)
+
+    def slow_status(symbol):
+        # The first status poll takes long enough to make the other order stale
+        if symbol == 'BTC/USDT':
+            frozen_datetime.advance(5)
+
+    client = _LoopClient(on_status=slow_status)
+
+    _run_cycles(monkeypatch, client)
+
+    assert client.cancel_calls == [('BTC/USDT', 'btc-order'), ('ETH/USDT', 'eth-order')]
+
+
+def test_stale_threshold_change_applies_on_next_cycle(monkeypatch, frozen_datetime, stale_seconds):
+    """Test lowering PENDING_ORDER_STALE_SECONDS at runtime takes effect"""
+    _add_pending('BTC/USDT', 'btc-order')
+    frozen_datetime.advance(stale_seconds // 2)
+    client = _LoopClient()
+    cancels_before_change = []
+
+    def lower_threshold():
+        cancels_before_change.extend(client.cancel_calls)
+        monkeypatch.setattr(config, "PENDING_ORDER_STALE_SECONDS", stale_seconds // 4)
+
+    _run_cycles(monkeypatch, client, cycles=2, between_cycles=lower_threshold)
+
+    assert cancels_before_change == []
+    assert client.cancel_calls == [('BTC/USDT', 'btc-order')]
@@ -3,13 +3,16 @@ import unittest
 from execution import BinanceClient
 
 
+_MARKETS = {
+    'MATIC/USDT:USDT': {'symbol': 'MATIC/USDT:USDT', 'base': 'MATIC', 'quote': 'USDT'},
+    'LTC/USDT:USDT': {'symbol': 'LTC/USDT:USDT', 'base': 'LTC', 'quote': 'USDT'},
+}
+
+
 class FakeExchange:
     def __init__(self, should_fail=False):
         self.should_fail = should_fail
-        self.markets = {
-            'MATIC/USDT:USDT': {'symbol': 'MATIC/USDT:USDT', 'base': 'MATIC', 'quote': 'USDT'},
-            'LTC/USDT:USDT': {'symbol': 'LTC/USDT:USDT', 'base': 'LTC', 'quote': 'USDT'},
-        }
+        self.markets = {symbol: dict(market) for symbol, market in _MARKETS.items()}
         self.last_order = None
 
     def load_markets(self):
@@ -38,15 +41,28 @@ class SymbolResolutionAndClosureTests(unittest.TestCase):
         resolved = self.client._resolve_symbol('MATIC/USDT')
         self.assertEqual(resolved, 'MATIC/USDT:USDT')
 
+    def test_resolve_symbol_is_cached_until_markets_reload(self):
+        self.assertEqual(self.client._resolve_symbol('MATIC/USDT'), 'MATIC/USDT:USDT')
+        # In-place edits are not seen: the cached resolution is reused
+        self.client.exchange.markets['MATIC/USDT:USDT'] = {
+            'symbol': 'MATIC/USDT:RELOADED', 'base': 'MATIC', 'quote': 'USDT'}
+        self.assertEqual(self.client._resolve_symbol('MATIC/USDT'), 'MATIC/USDT:USDT')
+        # A new markets dict (load_markets refresh) invalidates the cache
+        self.client.exchange.markets = dict(self.client.exchange.markets)
+        self.assertEqual(self.client._resolve_symbol('MATIC/USDT'), 'MATIC/USDT:RELOADED')
+
     def test_close_position_market_uses_reduce_only_payload(self):
         order = self.client.close_position_market('LTC/USDT', 'buy', 1.5, 'tp_breach')
-        self.assertIsNotNone(order)
-        self.assertEqual(self.client.exchange.last_order['symbol'], 'LTC/USDT:USDT')
-        self.assertEqual(self.client.exchange.last_order['type'], 'market')
-        self.assertEqual(self.client.exchange.last_order['side'], 'buy')
-        self.assertEqual(self.client.exchange.last_order['amount'], 1.5)
-        self.assertEqual(self.client.exchange.last_order['price'], None)
-        self.assertEqual(self.client.exchange.last_order['params'], {'reduceOnly': True})
+        expected = {
+            'symbol': 'LTC/USDT:USDT',
+            'type': 'market',
+            'side': 'buy',
+            'amount': 1.5,
+            'price': None,
+            'params': {'reduceOnly': True},
+        }
+        self.assertEqual(self.client.exchange.last_order, expected)
+        self.assertEqual(order, {'id': 'test', **expected})
 
 
 if __name__ == '__main__':
@@ -1,245 +1,203 @@
 """
 Unit tests for TP/SL reconciliation logic
 """
-import unittest
-from unittest.mock import Mock, MagicMock, patch
-import sys
-import os
+import copy
+import random
+from types import SimpleNamespace
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
 
+import order_utils
 import state
-from main import reconcile_position_tp_sl
-
-
-class TestTPSLReconciliationLogic(unittest.TestCase):
-    """Test TP/SL reconciliation decision logic"""
-    
-    def setUp(self):
-        """Set up test fixtures"""
-        # Reset bot state before each test
-        state.bot_state.positions = {}
-        state.bot_state.exchange_open_orders = []
-        state.bot_state.pending_orders = {}
-        state.bot_state.reconciliation_log = []
-    
-    def test_compute_position_tp_sl_with_both_orders(self):
-        """Test computing TP/SL when both orders exist"""
-        symbol = 'BTC/USDT'
-        exchange_orders = [
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'STOP_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 40000.0
-            },
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'TAKE_PROFIT_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 50000.0
-            }
-        ]
-        
-        result = state.compute_position_tp_sl(symbol, exchange_orders)
-        
-        self.assertEqual(result['stop_loss'], 40000.0)
-        self.assertEqual(result['take_profit'], 50000.0)
-    
-    def test_compute_position_tp_sl_with_only_sl(self):
-        """Test computing TP/SL when only SL exists"""
-        symbol = 'ETH/USDT'
-        exchange_orders = [
-            {
-                'symbol': 'ETH/USDT',
-                'type': 'STOP_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 2800.0
-            }
-        ]
-        
-        result = state.compute_position_tp_sl(symbol, exchange_orders)
-        
-        self.assertEqual(result['stop_loss'], 2800.0)
-        self.assertIsNone(result['take_profit'])
-    
-    def test_compute_position_tp_sl_with_only_tp(self):
-        """Test computing TP/SL when only TP exists"""
-        symbol = 'SOL/USDT'
-        exchange_orders = [
-            {
-                'symbol': 'SOL/USDT',
-                'type': 'TAKE_PROFIT_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 120.0
-            }
-        ]
-        
-        result = state.compute_position_tp_sl(symbol, exchange_orders)
-        
-        self.assertIsNone(result['stop_loss'])
-        self.assertEqual(result['take_profit'], 120.0)
-    
-    def test_compute_position_tp_sl_no_orders(self):
-        """Test computing TP/SL when no TP/SL orders exist"""
-        symbol = 'BNB/USDT'
-        exchange_orders = [
-            {
-                'symbol': 'BNB/USDT',
-                'type': 'LIMIT',
-                'reduceOnly': False
-            }
-        ]
-        
-        result = state.compute_position_tp_sl(symbol, exchange_orders)
-        
-        self.assertIsNone(result['stop_loss'])
-        self.assertIsNone(result['take_profit'])
-    
-    def test_compute_position_tp_sl_different_symbol(self):
-        """Test that TP/SL from different symbol is not used"""
-        symbol = 'BTC/USDT'
-        exchange_orders = [
-            {
-                'symbol': 'ETH/USDT',  # Different symbol
-                'type': 'STOP_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 2800.0
-            }
-        ]
-        
-        result = state.compute_position_tp_sl(symbol, exchange_orders)
-        
-        self.assertIsNone(result['stop_loss'])
-        self.assertIsNone(result['take_profit'])
-    
-    def test_enrich_positions_with_tp_sl(self):
-        """Test enriching positions with TP/SL from orders"""
-        # Set up a position
-        state.bot_state.positions['BTC/USDT'] = {
-            'symbol': 'BTC/USDT',
-            'side': 'LONG',
-            'size': 0.1,
-            'entry_price': 45000.0,
-            'mark_price': 46000.0,
-            'unrealized_pnl': 100.0,
-            'leverage': 10,
-            'take_profit': None,
-            'stop_loss': None
-        }
-        
-        # Set up exchange orders
-        state.bot_state.exchange_open_orders = [
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'STOP_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 43000.0
-            },
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'TAKE_PROFIT_MARKET',
-                'reduceOnly': True,
-                'stopPrice': 49000.0
-            }
-        ]
-        
-        # Enrich positions
-        state.enrich_positions_with_tp_sl()
-        
-        # Verify TP/SL were added
-        position = state.bot_state.positions['BTC/USDT']
-        self.assertEqual(position['stop_loss'], 43000.0)
-        self.assertEqual(position['take_profit'], 49000.0)
-    
-    def test_enrich_positions_with_tp_sl_multiple_positions(self):
-        """Test enriching multiple positions with their respective TP/SL"""
-        # Set up multiple positions
-        state.bot_state.positions['BTC/USDT'] = {
-            'symbol': 'BTC/USDT',
-            'side': 'LONG',
-            'size': 0.1,
-            'entry_price': 45000.0,
-            'take_profit': None,
-            'stop_loss': None
-        }
-        state.bot_state.positions['ETH/USDT'] = {
-            'symbol': 'ETH/USDT',
-            'side': 'SHORT',
-            'size': 2.0,
-            'entry_price': 3000.0,
-            'take_profit': None,
-            'stop_loss': None
-        }
-        
-        # Set up exchange orders for both
-        state.bot_state.exchange_open_orders = [
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'STOP_MARKET',
-                'stopPrice': 43000.0
-            },
-            {
-                'symbol': 'BTC/USDT',
-                'type': 'TAKE_PROFIT_MARKET',
-                'stopPrice': 49000.0
-            },
-            {
-                'symbol': 'ETH/USDT',
-                'type': 'STOP_MARKET',
-                'stopPrice': 3100.0
-            },
-            {
-                'symbol': 'ETH/USDT',
-                'type': 'TAKE_PROFIT_MARKET',
-                'stopPrice': 2800.0
-            }
-        ]
-        
-        # Enrich positions
-        state.enrich_positions_with_tp_sl()
-        
-        # Verify both positions got correct TP/SL
-        btc_position = state.bot_state.positions['BTC/USDT']
-        self.assertEqual(btc_position['stop_loss'], 43000.0)
-        self.assertEqual(btc_position['take_profit'], 49000.0)
-        
-        eth_position = state.bot_state.positions['ETH/USDT']
-        self.assertEqual(eth_position['stop_loss'], 3100.0)
-        self.assertEqual(eth_position['take_profit'], 2800.0)
-
-    @patch("main.order_utils.safe_place_tp_sl")
-    @patch("main.order_utils.check_backoff", return_value=(False, 0))
-    def test_reconcile_uses_explicit_short_side(self, mock_backoff, mock_safe_place):
-        """Ensure reconcile_position_tp_sl respects explicit SHORT side even with positive size"""
-        mock_safe_place.return_value = True
-
-        mock_client = Mock()
-        mock_client.exchange = Mock()
-        mock_client.exchange.price_to_precision = Mock(side_effect=lambda s, p: p)
-        mock_client.exchange.amount_to_precision = Mock(side_effect=lambda s, a: a)
-        mock_client.get_tp_sl_orders_for_position = Mock(return_value={"sl_order": None, "tp_order": None})
-        mock_client.cancel_order = Mock(return_value=True)
-
-        position = {
-            "symbol": "SOL/USDT",
-            "side": "SHORT",
-            # Positive position size with explicit SHORT side mimics hedged-mode payloads
-            "positionAmt": 112.0,
-            "entryPrice": 124.28,
-        }
-
-        success = reconcile_position_tp_sl(mock_client, "SOL/USDT", position, pending_order=None)
-
-        self.assertTrue(success)
-        mock_safe_place.assert_called_once()
-        _, _, is_long_arg, _, tp_price, sl_price = mock_safe_place.call_args[0]
-
-        self.assertFalse(is_long_arg)
-        self.assertLess(tp_price, position["entryPrice"])
-        self.assertGreater(sl_price, position["entryPrice"])
-
-
-if __name__ == '__main__':
-    unittest.main()
+
+
+# Read-only exchange orders shared by the compute_position_tp_sl tests
+BTC_SL_ORDER = {'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True, 'stopPrice': 40000.0}
+BTC_TP_ORDER = {'symbol': 'BTC/USDT', 'type': 'TAKE_PROFIT_MARKET', 'reduceOnly': True, 'stopPrice': 50000.0}
+ETH_SL_ORDER = {'symbol': 'ETH/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True, 'stopPrice': 2800.0}
+SOL_TP_ORDER = {'symbol': 'SOL/USDT', 'type': 'TAKE_PROFIT_MARKET', 'reduceOnly': True, 'stopPrice': 120.0}
+BNB_LIMIT_ORDER = {'symbol': 'BNB/USDT', 'type': 'LIMIT', 'reduceOnly': False}
+BOTH_ORDERS = [BTC_SL_ORDER, BTC_TP_ORDER]
+
+# Position templates; enrich_positions_with_tp_sl writes into them, so tests copy them
+BTC_LONG_POSITION = {
+    'symbol': 'BTC/USDT',
+    'side': 'LONG',
+    'size': 0.1,
+    'entry_price': 45000.0,
+    'mark_price': 46000.0,
+    'unrealized_pnl': 100.0,
+    'leverage': 10,
+    'take_profit': None,
+    'stop_loss': None
+}
+ETH_SHORT_POSITION = {
+    'symbol': 'ETH/USDT',
+    'side': 'SHORT',
+    'size': 2.0,
+    'entry_price': 3000.0,
+    'take_profit': None,
+    'stop_loss': None
+}
+
+# ccxt-format orders fed through update_exchange_open_orders (read only)
+BTC_ORDERS = [
+    {'id': 'btc-sl', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True, 'stopPrice': 43000.0},
+    {'id': 'btc-tp', 'symbol': 'BTC/USDT', 'type': 'TAKE_PROFIT_MARKET', 'reduceOnly': True, 'stopPrice': 49000.0},
+]
+ETH_ORDERS = [
+    {'id': 'eth-sl', 'symbol': 'ETH/USDT', 'type': 'STOP_MARKET', 'stopPrice': 3100.0},
+    {'id': 'eth-tp', 'symbol': 'ETH/USDT', 'type': 'TAKE_PROFIT_MARKET', 'stopPrice': 2800.0},
+]
+
+
+def _stub_client():
+    """Client exposing only what reconcile_position_tp_sl uses: identity precision, no TP/SL."""
+    return SimpleNamespace(
+        exchange=SimpleNamespace(
+            price_to_precision=lambda s, p: p,
+            amount_to_precision=lambda s, a: a,
+        ),
+        get_tp_sl_orders_for_position=lambda symbol, orders=None: {"sl_order": None, "tp_order": None},
+        cancel_order=lambda symbol, order_id: True,
+    )
+
+
+@pytest.mark.parametrize("symbol,orders,expected_sl,expected_tp", [
+    ('BTC/USDT', BOTH_ORDERS, 40000.0, 50000.0),
+    ('ETH/USDT', [ETH_SL_ORDER], 2800.0, None),
+    ('SOL/USDT', [SOL_TP_ORDER], None, 120.0),
+    # Non TP/SL orders are ignored
+    ('BNB/USDT', [BNB_LIMIT_ORDER], None, None),
+    # TP/SL from a different symbol is not used
+    ('BTC/USDT', [ETH_SL_ORDER], None, None),
+    # ccxt reports order types in lower case
+    ('BTC/USDT', [dict(BTC_SL_ORDER, type='stop_market'), dict(BTC_TP_ORDER, type='take_profit_market')],
+     40000.0, 50000.0),
+], ids=["both_orders", "only_sl", "only_tp", "no_tp_sl_orders", "different_symbol", "ccxt_lowercase_types"])
+def test_compute_position_tp_sl(symbol, orders, expected_sl, expected_tp):
+    """Test computing TP/SL from the exchange orders for a symbol"""
+    result = state.compute_position_tp_sl(symbol, orders)
+
+    assert result['stop_loss'] == expected_sl
+    assert result['take_profit'] == expected_tp
+
+
+def test_compute_position_tp_sl_assume_filtered_skips_symbol_check():
+    """Test that pre-filtered orders are used without re-checking the symbol"""
+    result = state.compute_position_tp_sl('BTC/USDT', [ETH_SL_ORDER], assume_filtered=True)
+
+    assert result['stop_loss'] == 2800.0
+    assert result['take_profit'] is None
+
+
+def _reference_tp_sl(symbol, orders):
+    """Straightforward TP/SL scan used to cross-check compute_position_tp_sl"""
+    result = {'take_profit': None, 'stop_loss': None}
+    for order in orders:
+        if order.get('symbol') != symbol:
+            continue
+        order_type = (order.get('type') or '').upper()
+        stop_price = order.get('stopPrice', order.get('stop_price'))
+        if order_type == 'STOP_MARKET' and stop_price:
+            result['stop_loss'] = float(stop_price)
+        elif order_type == 'TAKE_PROFIT_MARKET' and stop_price:
+            result['take_profit'] = float(stop_price)
+    return result
+
+
+def test_compute_position_tp_sl_matches_reference_on_random_orders():
+    """Test compute_position_tp_sl against a reference scan over seeded random order lists"""
+    rng = random.Random(1234)
+    symbols = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+    order_types = ['STOP_MARKET', 'TAKE_PROFIT_MARKET', 'stop_market', 'take_profit_market', 'LIMIT', None]
+
+    for _ in range(500):
+        orders = []
+        for _ in range(rng.randint(0, 8)):
+            order = {'symbol': rng.choice(symbols), 'type': rng.choice(order_types)}
+            price_field = rng.choice(['stopPrice', 'stop_price', None])
+            if price_field:
+                order[price_field] = rng.choice([None, 0, round(rng.uniform(1, 50000), 2)])
+            orders.append(order)
+        symbol = rng.choice(symbols)
+
+        assert state.compute_position_tp_sl(symbol, orders) == _reference_tp_sl(symbol, orders), orders
+
+
+@pytest.mark.parametrize("positions,orders,expected", [
+    ([BTC_LONG_POSITION], BTC_ORDERS, {'BTC/USDT': (43000.0, 49000.0)}),
+    ([BTC_LONG_POSITION, ETH_SHORT_POSITION], BTC_ORDERS + ETH_ORDERS,
+     {'BTC/USDT': (43000.0, 49000.0), 'ETH/USDT': (3100.0, 2800.0)}),
+    # Orders are looked up per position symbol; other symbols' orders are never applied
+    ([BTC_LONG_POSITION], ETH_ORDERS, {'BTC/USDT': (None, None)}),
+    # With several stop orders on one symbol the last one in exchange order wins
+    ([BTC_LONG_POSITION], BTC_ORDERS + [
+        {'id': 'btc-sl-2', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True, 'stopPrice': 42000.0},
+        {'id': 'btc-sl-0', 'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'reduceOnly': True, 'stopPrice': 41000.0},
+    ], {'BTC/USDT': (41000.0, 49000.0)}),
+], ids=["single_position", "multiple_positions", "orders_for_other_symbol", "last_stop_order_wins"])
+def test_enrich_positions_with_tp_sl(positions, orders, expected):
+    """Test enriching each position with the TP/SL from its own orders"""
+    local_state = state.BotState()
+    for position in positions:
+        local_state.positions[position['symbol']] = copy.copy(position)
+    state.update_exchange_open_orders(orders, local_state)
+
+    state.enrich_positions_with_tp_sl(local_state)
+
+    for symbol, (expected_sl, expected_tp) in expected.items():
+        assert local_state.positions[symbol]['stop_loss'] == expected_sl
+        assert local_state.positions[symbol]['take_profit'] == expected_tp
+
+
+def test_update_exchange_open_orders_keeps_orders_without_id():
+    """Test that orders with a missing or empty id do not overwrite each other"""
+    local_state = state.BotState()
+    orders = [
+        {'symbol': 'BTC/USDT', 'type': 'STOP_MARKET', 'stopPrice': 43000.0},
+        {'id': '', 'symbol': 'BTC/USDT', 'type': 'TAKE_PROFIT_MARKET', 'stopPrice': 49000.0},
+        {'id': 'btc-limit', 'symbol': 'BTC/USDT', 'type': 'LIMIT', 'price': 45000.0},
+    ]
+
+    state.update_exchange_open_orders(orders, local_state)
+
+    assert len(local_state.exchange_open_orders) == 3
+    assert local_state.metrics.open_exchange_orders_count == 3
+    assert [o['type'] for o in state.iter_open_orders_for_symbol('BTC/USDT', local_state)] == \
+        ['STOP_MARKET', 'TAKE_PROFIT_MARKET', 'LIMIT']
+
+
+def test_reconcile_uses_explicit_short_side(monkeypatch):
+    """Ensure reconcile_position_tp_sl respects explicit SHORT side even with positive size"""
+    # Imported here so collecting the compute/enrich tests does not load main
+    from main import reconcile_position_tp_sl
+
+    captured = []
+
+    def fake_safe_place(client, symbol, is_long, amount, tp_price, sl_price, **kwargs):
+        captured.append((is_long, tp_price, sl_price))
+        return True
+
+    monkeypatch.setattr(order_utils, "safe_place_tp_sl", fake_safe_place)
+    monkeypatch.setattr(order_utils, "check_backoff", lambda symbol: (False, 0))
+
+    mock_client = _stub_client()
+
+    position = {
+        "symbol": "SOL/USDT",
+        "side": "SHORT",
+        # Positive position size with explicit SHORT side mimics hedged-mode payloads
+        "positionAmt": 112.0,
+        "entryPrice": 124.28,
+    }
+
+    success = reconcile_position_tp_sl(mock_client, "SOL/USDT", position, pending_order=None)
+
+    assert success
+    assert len(captured) == 1
+    is_long, tp_price, sl_price = captured[0]
+
+    assert is_long is False
+    assert tp_price < position["entryPrice"]
+    assert sl_price > position["entryPrice"]
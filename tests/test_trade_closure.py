@@ -0,0 +1,80 @@
+"""
+Tests for closing trades in history when positions disappear
+"""
+import unittest
+from unittest.mock import Mock
+import os
+import shutil
+import tempfile
+
+import pytest
+
+import state
+
+
+class TestCloseTradeInHistoryWithWarningThrottling(unittest.TestCase):
+    """Test that the exit-price fallback warning is throttled per symbol"""
+
+    @pytest.fixture(autouse=True)
+    def _frozen_clock(self, frozen_now):
+        self.clock = frozen_now
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self._orig_trade_history_file = state.TRADE_HISTORY_FILE
+        state.TRADE_HISTORY_FILE = os.path.join(self.temp_dir, 'trade_history.jsonl')
+        state._exit_price_fallback_warnings.clear()
+        self.mock_warn = Mock()
+        state._warn = self.mock_warn
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        state.TRADE_HISTORY_FILE = self._orig_trade_history_file
+        state._warn = print
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _open_and_close(self, symbol, mark_price):
+        state.add_trade({'symbol': symbol, 'side': 'LONG', 'entry_price': 100.0,
+                         'size': 1.0, 'status': 'OPEN', 'pnl': None})
+        state._close_trade_in_history(symbol, {'mark_price': mark_price, 'entry_price': 100.0})
+
+    def _fallback_warnings(self):
+        return [c.args[0] for c in self.mock_warn.call_args_list
+                if 'exit_price fallback' in c.args[0]]
+
+    def test_repeated_fallback_within_interval_warns_once(self):
+        """Test repeated fallbacks for the same symbol are throttled"""
+        self._open_and_close('BTC/USDT', 0)
+        self._open_and_close('BTC/USDT', 0)
+
+        self.assertEqual(len(self._fallback_warnings()), 1)
+        self.assertTrue(all(t['status'] == 'CLOSED' for t in state.bot_state.trade_history))
+
+    def test_fallback_warning_tracked_per_symbol(self):
+        """Test each symbol gets its own warning"""
+        self._open_and_close('BTC/USDT', 0)
+        self._open_and_close('ETH/USDT', 0)
+
+        self.assertEqual(len(self._fallback_warnings()), 2)
+
+    def test_fallback_warns_again_after_interval(self):
+        """Test the warning recurs once the throttle interval has passed"""
+        self._open_and_close('BTC/USDT', 0)
+        self._open_and_close('BTC/USDT', 0)
+        self.clock.advance(state.EXIT_PRICE_WARNING_INTERVAL_SECONDS)
+        self._open_and_close('BTC/USDT', 0)
+
+        warnings = self._fallback_warnings()
+        self.assertEqual(len(warnings), 2)
+        self.assertIn('[repeated 1 times', warnings[1])
+
+    def test_valid_mark_price_does_not_warn(self):
+        """Test a close with a real mark price uses it without warning"""
+        self._open_and_close('BTC/USDT', 105.0)
+
+        self.assertEqual(self._fallback_warnings(), [])
+        self.assertEqual(state.bot_state.trade_history[0]['exit_price'], 105.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,44 +3,55 @@ Tests for new utility functions: symbol normalization, tick-tolerant price compa
 and log throttling.
 """
 import unittest
-import datetime
-from datetime import timezone
-import sys
-import os
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
 
 import order_utils
 
 
-class TestNormalizeSymbol(unittest.TestCase):
+@pytest.mark.parametrize("raw, expected", [
+    ("BTC/USDT", "BTC/USDT"),           # spot symbol
+    ("XRP/USDT:USDT", "XRP/USDT"),      # futures suffix
+    ("BTC/USDT:USDT", "BTC/USDT"),
+    ("SOL/USDT:USDT", "SOL/USDT"),
+    ("btc/usdt", "BTC/USDT"),           # lowercase
+    ("xrp/usdt:usdt", "XRP/USDT"),
+    ("Btc/Usdt", "BTC/USDT"),           # mixed case
+    ("Eth/usdt:USDT", "ETH/USDT"),
+    (None, None),                       # falsy input returned unchanged
+    ("", ""),
+])
+def test_normalize_symbol(raw, expected):
     """Test symbol normalization function"""
-    
-    def test_normalize_spot_symbol(self):
-        """Test normalizing standard spot symbol"""
-        self.assertEqual(order_utils.normalize_symbol("BTC/USDT"), "BTC/USDT")
-    
-    def test_normalize_futures_symbol(self):
-        """Test normalizing futures symbol with suffix"""
-        self.assertEqual(order_utils.normalize_symbol("XRP/USDT:USDT"), "XRP/USDT")
-        self.assertEqual(order_utils.normalize_symbol("BTC/USDT:USDT"), "BTC/USDT")
-        self.assertEqual(order_utils.normalize_symbol("SOL/USDT:USDT"), "SOL/USDT")
-    
-    def test_normalize_lowercase(self):
-        """Test that lowercase is converted to uppercase"""
-        self.assertEqual(order_utils.normalize_symbol("btc/usdt"), "BTC/USDT")
-        self.assertEqual(order_utils.normalize_symbol("xrp/usdt:usdt"), "XRP/USDT")
-    
-    def test_normalize_mixed_case(self):
-        """Test mixed case symbols"""
-        self.assertEqual(order_utils.normalize_symbol("Btc/Usdt"), "BTC/USDT")
-        self.assertEqual(order_utils.normalize_symbol("Eth/usdt:USDT"), "ETH/USDT")
-    
-    def test_normalize_none_and_empty(self):
-        """Test handling of None and empty strings"""
-        self.assertIsNone(order_utils.normalize_symbol(None))
-        self.assertEqual(order_utils.normalize_symbol(""), "")
+    assert order_utils.normalize_symbol(raw) == expected
+
+
+def test_normalize_symbol_cache_is_bounded():
+    """Test the symbol cache stays bounded and correct past its size limit"""
+    maxsize = order_utils.normalize_symbol.cache_info().maxsize
+    assert maxsize is not None
+    order_utils.normalize_symbol.cache_clear()
+
+    for i in range(maxsize + 100):
+        assert order_utils.normalize_symbol(f"coin{i}/usdt:usdt") == f"COIN{i}/USDT"
+
+    assert order_utils.normalize_symbol.cache_info().currsize <= maxsize
+    # Evicted entries are recomputed correctly
+    assert order_utils.normalize_symbol("coin0/usdt:usdt") == "COIN0/USDT"
+
+
+def test_normalize_symbol_repeat_calls_use_cache():
+    """Test repeated symbols are answered from the cache without re-running the body"""
+    order_utils.normalize_symbol.cache_clear()
+    first = order_utils.normalize_symbol("xrp/usdt:usdt")
+    before = order_utils.normalize_symbol.cache_info()
+
+    again = order_utils.normalize_symbol("xrp/usdt:usdt")
+    after = order_utils.normalize_symbol.cache_info()
+
+    assert again is first
+    assert after.hits == before.hits + 1
+    assert after.misses == before.misses
 
 
 class TestPricesAreEqual(unittest.TestCase):
@@ -98,9 +109,38 @@ class TestPricesAreEqual(unittest.TestCase):
         self.assertTrue(order_utils.prices_are_equal(100.0, 100.0, 0))
 
 
+class TestOrderQuantityMatches(unittest.TestCase):
+    """Test TP/SL order quantity matching"""
+    
+    def test_exact_match(self):
+        """Test identical quantity matches"""
+        self.assertTrue(order_utils.order_quantity_matches({'amount': 0.5}, 0.5, 0.01))
+    
+    def test_within_tolerance(self):
+        """Test quantity within relative tolerance matches"""
+        self.assertTrue(order_utils.order_quantity_matches({'amount': 0.995}, 1.0, 0.01))
+        self.assertFalse(order_utils.order_quantity_matches({'amount': 0.98}, 1.0, 0.01))
+    
+    def test_string_amount(self):
+        """Test string amounts are compared numerically"""
+        self.assertTrue(order_utils.order_quantity_matches({'amount': '1.0'}, 1.0, 0.01))
+    
+    def test_missing_order_or_amount(self):
+        """Test missing order or amount never matches"""
+        self.assertFalse(order_utils.order_quantity_matches(None, 1.0, 0.01))
+        self.assertFalse(order_utils.order_quantity_matches({}, 1.0, 0.01))
+        self.assertFalse(order_utils.order_quantity_matches({'amount': None}, 1.0, 0.01))
+        self.assertFalse(order_utils.order_quantity_matches({'amount': 'bad'}, 1.0, 0.01))
+
+
 class TestLogThrottling(unittest.TestCase):
     """Test log throttling functionality"""
     
+    @pytest.fixture(autouse=True)
+    def _frozen_clock(self, frozen_now):
+        """Run every throttle test against a frozen clock"""
+        self.clock = frozen_now
+
     def setUp(self):
         """Reset throttle state before each test"""
         order_utils._log_throttle_state = {}
@@ -157,10 +197,20 @@ class TestLogThrottling(unittest.TestCase):
         order_utils.should_log_throttled("test_category", "BTC/USDT")
         order_utils.should_log_throttled("test_category", "BTC/USDT")
         
-        # Check count (by manipulating time - this is a simplified test)
-        # In real use, after interval, should_log would return True with suppressed count
-        state = order_utils._log_throttle_state.get(("test_category", "BTC/USDT"))
-        self.assertEqual(state["count"], 3)
+        entry = order_utils._log_throttle_state["test_category"]["BTC/USDT"]
+        self.assertEqual(entry.count, 3)
+    
+    def test_log_allowed_after_interval_reports_suppressed(self):
+        """Test that logging resumes after the interval with the suppressed count"""
+        order_utils.should_log_throttled("test_category", "BTC/USDT")
+        order_utils.should_log_throttled("test_category", "BTC/USDT")
+        order_utils.should_log_throttled("test_category", "BTC/USDT")
+        
+        self.clock.advance(order_utils.LOG_THROTTLE_INTERVAL_SECONDS)
+        
+        should_log, suppressed = order_utils.should_log_throttled("test_category", "BTC/USDT")
+        self.assertTrue(should_log)
+        self.assertEqual(suppressed, 2)
 
 
 class TestThrottledLogFunctions(unittest.TestCase):
@@ -176,7 +226,7 @@ class TestThrottledLogFunctions(unittest.TestCase):
         order_utils.log_tp_sl_inconsistent_throttled("BTC/USDT", "LONG", 40000, 45000, 38000)
         
         # Verify state was created
-        self.assertIn(("tp_sl_inconsistent", "BTC/USDT"), order_utils._log_throttle_state)
+        self.assertIn("BTC/USDT", order_utils._log_throttle_state["tp_sl_inconsistent"])
     
     def test_log_pending_order_active_throttled_first_call(self):
         """Test that first call to log_pending_order_active_throttled logs"""
@@ -184,7 +234,7 @@ class TestThrottledLogFunctions(unittest.TestCase):
         order_utils.log_pending_order_active_throttled("12345", "ETH/USDT")
         
         # Verify state was created
-        self.assertIn(("pending_order_active", "ETH/USDT"), order_utils._log_throttle_state)
+        self.assertIn("ETH/USDT", order_utils._log_throttle_state["pending_order_active"])
 
 
 if __name__ == '__main__':
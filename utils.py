@@ -1,10 +1,16 @@
-import config
+# Trading pairs are fixed at startup; share one immutable copy with all callers.
+# Built on first use so importing utils does not load config.
+_TRADING_PAIRS = None
 
 def get_trading_pairs():
     """
-    Returns the fixed list of trading pairs from config.
+    Returns the fixed trading pairs from config as a tuple.
     """
-    return config.TRADING_PAIRS
+    global _TRADING_PAIRS
+    if _TRADING_PAIRS is None:
+        import config
+        _TRADING_PAIRS = tuple(config.TRADING_PAIRS)
+    return _TRADING_PAIRS
 
 if __name__ == "__main__":
     print("Trading pairs:", get_trading_pairs())
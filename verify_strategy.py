@@ -6,38 +6,33 @@ import lux_algo
 # We need at least 20+ points if length=2.
 # Let's generate a sine wave or recognizable pattern.
 import numpy as np
-timestamps = pd.date_range(start='2024-01-01', periods=100, freq='30min')
-closes = 100 + 10 * np.sin(np.linspace(0, 3*np.pi, 100))
-highs = closes + 1
-lows = closes - 1
-opens = closes # simplified
+timestamps = pd.date_range(start='2024-01-01', periods=100, freq='30min', name='timestamp')
+# One contiguous (100, 4) buffer in open/high/low/close column order
+OPEN, HIGH, LOW, CLOSE = range(4)
+ohlc = np.empty((100, 4))
+ohlc[:, CLOSE] = 100 + 10 * np.sin(np.linspace(0, 3*np.pi, 100))
+ohlc[:, HIGH] = ohlc[:, CLOSE] + 1
+ohlc[:, LOW] = ohlc[:, CLOSE] - 1
+ohlc[:, OPEN] = ohlc[:, CLOSE] # simplified
+lows = ohlc[:, LOW]
 
-df = pd.DataFrame({
-    'timestamp': timestamps,
-    'open': opens,
-    'high': highs,
-    'low': lows,
-    'close': closes,
-    'volume': [1000]*100
-})
-df.set_index('timestamp', inplace=True)
+volume = np.full(100, 1000, dtype=np.int64)
 
 # Add a specific drop spike to trigger Bullish OB
 # Index 50: Low drops significantly below recent range
-df.iloc[50, df.columns.get_loc('low')] = df['low'].iloc[40:50].min() - 5
+lows[50] = lows[40:50].min() - 5
 # Ensure it's a pivot: neighbors higher
-df.iloc[49, df.columns.get_loc('low')] = df.iloc[50]['low'] + 2
-df.iloc[51, df.columns.get_loc('low')] = df.iloc[50]['low'] + 2
+lows[49] = lows[50] + 2
 
 # GAP UP after index 50 to avoid mitigation
 # OB Top is High[50]. Let's say High[50] is Low[50]+1.
 # We need Low[51+] > High[50].
-ob_top = df.iloc[50]['high']
-# Force subsequent lows to be strictly above ob_top
-df.iloc[51:, df.columns.get_loc('low')] = ob_top + 2
-df.iloc[51:, df.columns.get_loc('high')] = ob_top + 5
-df.iloc[51:, df.columns.get_loc('close')] = ob_top + 3
-df.iloc[51:, df.columns.get_loc('open')] = ob_top + 3
+ob_top = ohlc[50, HIGH]
+# Force subsequent lows to be strictly above ob_top (broadcast over the rows)
+ohlc[51:, [LOW, HIGH, CLOSE, OPEN]] = ob_top + np.array([2, 5, 3, 3])
+
+df = pd.DataFrame(ohlc, columns=['open', 'high', 'low', 'close'], index=timestamps)
+df['volume'] = volume
 
 # DEBUG: Print data around spike
 print("\nCheck Spike Data:")
@@ -52,7 +47,7 @@ obs = lux_algo.detect_order_blocks(df, length=2)
 print("\nLower Band at 50:")
 # period = 2 * 10 = 20
 # lower_band[50] = min(low[30:50])
-print(df['low'].rolling(20).min().shift(1).iloc[50])
+print(df['low'].to_numpy()[30:50].min())
 
 
 print(f"Found {len(obs)} Order Blocks.")
@@ -6,11 +6,10 @@ symbols = utils.get_top_symbols(limit=config.TOP_N_COINS)
 print(f"Fetched {len(symbols)} symbols: {symbols}")
 
 print("\nChecking against Blacklist...")
-blacklist_hit = False
-for s in symbols:
-    if s in config.BLACKLIST:
-        print(f"FAIL: Found blacklisted symbol {s}")
-        blacklist_hit = True
+blacklist_hits = frozenset(config.BLACKLIST).intersection(symbols)
+for s in sorted(blacklist_hits):
+    print(f"FAIL: Found blacklisted symbol {s}")
+blacklist_hit = bool(blacklist_hits)
 
 if not blacklist_hit:
     print("PASS: No stablecoins found.")